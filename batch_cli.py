@@ -0,0 +1,376 @@
+"""
+Headless batch mode: tailor one saved profile to many job descriptions.
+
+Takes a profile saved by "Download All Data" (any schema version) plus either a
+directory of job descriptions (*.txt / *.md, one posting per file; an optional
+first line "Position: <title>" sets the target role) or a JSONL file with
+{"id", "position", "description"} records, and writes for each posting:
+
+    <out>/<id>/resume.md, resume.txt, resume.pdf, cover_letter.txt
+
+(characters in an id other than letters, digits, ".", "_" and "-" are replaced
+with "_", so every posting's files stay inside <out>.)
+
+Postings are processed with bounded concurrency under the Gemini request and
+token quotas (shared with the web app when RESUMEFORGE_RATE_LIMIT_SHARED is set).
+Finished postings are recorded in <out>/manifest.jsonl, so re-running the same
+command after a crash skips completed work. A timing report is written to
+<out>/report.json, along with each resume's job-description keyword coverage, and
+per-stage metrics (Prometheus text format) to <out>/metrics.prom.
+
+Usage (GEMINI_API_KEY must be set in the environment):
+    python batch_cli.py profile.json --jobs postings/ --out out/ [--concurrency 4] [--rpm 30]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import prompts
+import settings
+from profile_model import load_profile
+from context_cache import build_context_cache
+from gemini_client import GeminiClient, GeminiError
+from metrics import metrics
+from pdf_export import PdfRenderError, PdfRenderPool, RenderCache, markdown_to_plain_text
+from rate_limit import build_rate_limiter
+from response_cache import ResponseCache
+from skills_engine import SkillExtractor, coverage_score, load_taxonomy
+from task_profiles import load_model_quotas, load_task_profiles
+from template_registry import TemplateRegistry
+
+OUTPUT_KINDS = ("markdown", "text", "pdf", "cover_letter")
+
+
+def posting_id(raw_id):
+    """
+    The output directory name for a posting id: characters other than letters,
+    digits, ".", "_" and "-" become "_", so an id can never name a path outside
+    the output directory. Raises ValueError for ids that are empty or all dots.
+    """
+    safe_id = re.sub(r"[^A-Za-z0-9._-]", "_", str(raw_id))
+    if not safe_id.strip("."):
+        raise ValueError(f"invalid posting id {raw_id!r}")
+    return safe_id
+
+
+def _is_posting_id(value):
+    try:
+        return isinstance(value, str) and posting_id(value) == value
+    except ValueError:
+        return False
+
+
+def load_job_descriptions(path):
+    """
+    Reads postings from a directory of text files or a JSONL file. Raises
+    ValueError for a malformed record, an unusable id, or two postings whose
+    ids map to the same output directory.
+    """
+    postings = []
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            if not filename.endswith((".txt", ".md")):
+                continue
+            with open(os.path.join(path, filename), encoding="utf-8") as f:
+                text = f.read()
+            position = None
+            first_line, _, rest = text.partition("\n")
+            if first_line.lower().startswith("position:"):
+                position = first_line.split(":", 1)[1].strip()
+                text = rest
+            postings.append({'id': posting_id(os.path.splitext(filename)[0]), 'position': position, 'description': text.strip()})
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("expected a JSON object")
+                    postings.append({
+                        'id': posting_id(record.get('id') or line_number),
+                        'position': str(record['position']) if record.get('position') is not None else None,
+                        'description': str(record.get('description') or ''),
+                    })
+                except ValueError as e:
+                    raise ValueError(f"{path}, line {line_number}: {e}") from e
+    seen = set()
+    for posting in postings:
+        if posting['id'] in seen:
+            raise ValueError(f"more than one posting has the id {posting['id']!r}")
+        seen.add(posting['id'])
+    return postings
+
+
+def _fingerprint(var_for_ai, options):
+    canonical = json.dumps({'profile': var_for_ai, 'options': options}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path, data):
+    mode = "wb" if isinstance(data, bytes) else "w"
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode, **({} if mode == "wb" else {'encoding': 'utf-8'})) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class BatchRunner:
+    """Generates documents for each posting and records progress in a manifest."""
+
+    def __init__(self, profile, out_dir, client, registry, pdf_pool, template_name, outputs, temperature, skill_extractor=None, task_profiles=None):
+        self.profile = profile
+        self.out_dir = out_dir
+        self.client = client
+        self.registry = registry
+        self.pdf_pool = pdf_pool
+        self.template_name = template_name
+        self.outputs = outputs
+        self.temperature = temperature
+        self.skill_extractor = skill_extractor
+        self.task_profiles = task_profiles or {}
+        self.manifest_path = os.path.join(out_dir, "manifest.jsonl")
+        self._manifest_lock = threading.Lock()
+
+    def completed(self):
+        """Returns {posting id: fingerprint} for postings finished by earlier runs whose files still exist."""
+        done = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue # a partially written last line from a crash
+                    if not isinstance(record, dict) or not _is_posting_id(record.get('id')):
+                        continue # not written by this tool; never joined into a path
+                    job_dir = os.path.join(self.out_dir, record['id'])
+                    if record.get('status') == 'done' and all(os.path.exists(os.path.join(job_dir, name)) for name in record['files']):
+                        done[record['id']] = record['fingerprint']
+                    else:
+                        done.pop(record.get('id'), None)
+        return done
+
+    def _record(self, record):
+        with self._manifest_lock:
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def _generate(self, prompt, task, context):
+        return self.client.generate_text(prompt, temperature=self.temperature, profile=self.task_profiles.get(task), context=context)
+
+    def run_one(self, posting, fingerprint):
+        """Produces every requested output for one posting; returns its report record."""
+        started = time.perf_counter()
+        timings = {}
+        record = {'id': posting['id'], 'fingerprint': fingerprint, 'files': []}
+        try:
+            var_for_ai = self.profile.to_prompt_dict(posting['position'], posting['description'])
+            job_dir = os.path.join(self.out_dir, posting['id'])
+            os.makedirs(job_dir, exist_ok=True)
+            # Shared by this posting's resume and cover letter calls, so it is uploaded once
+            context = prompts.build_profile_context(var_for_ai, settings.PROMPT_TOKEN_BUDGET)
+            if {"markdown", "text", "pdf"} & set(self.outputs):
+                missing_fields = prompts.missing_resume_fields(var_for_ai)
+                if missing_fields:
+                    raise ValueError(f"missing resume fields: {', '.join(missing_fields)}")
+                t = time.perf_counter()
+                resume_markdown = self._generate(prompts.build_resume_prompt(var_for_ai), "resume", context)
+                timings['resume'] = time.perf_counter() - t
+                if self.skill_extractor is not None:
+                    record['keyword_coverage'] = coverage_score(self.skill_extractor, posting['description'], resume_markdown)['score']
+                if "markdown" in self.outputs:
+                    _write_atomic(os.path.join(job_dir, "resume.md"), resume_markdown)
+                    record['files'].append("resume.md")
+                if "text" in self.outputs:
+                    _write_atomic(os.path.join(job_dir, "resume.txt"), markdown_to_plain_text(resume_markdown))
+                    record['files'].append("resume.txt")
+                if "pdf" in self.outputs:
+                    t = time.perf_counter()
+                    job_id = self.pdf_pool.submit(
+                        resume_markdown,
+                        self.registry.get(self.template_name),
+                        self.registry.template_id(self.template_name),
+                    )
+                    _write_atomic(os.path.join(job_dir, "resume.pdf"), self.pdf_pool.wait(job_id))
+                    timings['pdf'] = time.perf_counter() - t
+                    record['files'].append("resume.pdf")
+            if "cover_letter" in self.outputs:
+                cl_missing_fields = prompts.missing_cover_letter_fields(var_for_ai)
+                if cl_missing_fields:
+                    raise ValueError(f"missing cover letter fields: {', '.join(cl_missing_fields)}")
+                t = time.perf_counter()
+                cover_letter = self._generate(prompts.build_cover_letter_prompt(), "cover_letter", context)
+                timings['cover_letter'] = time.perf_counter() - t
+                _write_atomic(os.path.join(job_dir, "cover_letter.txt"), cover_letter)
+                record['files'].append("cover_letter.txt")
+            record['status'] = 'done'
+        except (GeminiError, PdfRenderError, ValueError, OSError) as e:
+            record['status'] = 'failed'
+            record['error'] = str(e)
+        except Exception as e: # Anything unexpected fails this posting only; the batch and its report carry on
+            record['status'] = 'failed'
+            record['error'] = f"{type(e).__name__}: {e}"
+        timings['total'] = time.perf_counter() - started
+        record['timings'] = timings
+        self._record(record)
+        return record
+
+
+def summarize_report(records, skipped, wall_seconds):
+    """Builds the summary section of the timing report."""
+    def stats(values):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return {
+            'count': len(ordered),
+            'mean': statistics.fmean(ordered),
+            'p50': ordered[len(ordered) // 2],
+            'p95': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+            'max': ordered[-1],
+        }
+
+    stages = sorted({stage for record in records for stage in record['timings']})
+    return {
+        'processed': len(records),
+        'succeeded': sum(1 for record in records if record['status'] == 'done'),
+        'failed': sum(1 for record in records if record['status'] != 'done'),
+        'skipped_already_done': skipped,
+        'wall_seconds': wall_seconds,
+        'stages': {stage: stats([r['timings'][stage] for r in records if stage in r['timings']]) for stage in stages},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("profile", help="profile JSON saved from the app (Download All Data)")
+    parser.add_argument("--jobs", required=True, help="directory of .txt/.md postings or a .jsonl file")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--outputs", default=",".join(OUTPUT_KINDS), help=f"comma-separated subset of: {', '.join(OUTPUT_KINDS)}")
+    parser.add_argument("--template", default=settings.DEFAULT_RESUME_TEMPLATE, help="PDF layout name")
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--concurrency", type=int, default=4, help="postings processed at once")
+    parser.add_argument("--rpm", type=float, default=settings.GEMINI_REQUESTS_PER_MINUTE, help="max Gemini requests per minute per model, for models without a quota in task_profiles.json (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=settings.GEMINI_TOKENS_PER_MINUTE, help="max Gemini tokens per minute per model, for models without a quota in task_profiles.json (0 = unlimited)")
+    parser.add_argument("--force", action="store_true", help="regenerate postings already recorded as done")
+    args = parser.parse_args(argv)
+
+    outputs = [kind.strip() for kind in args.outputs.split(",") if kind.strip()]
+    unknown = set(outputs) - set(OUTPUT_KINDS)
+    if unknown:
+        parser.error(f"unknown outputs: {', '.join(sorted(unknown))}")
+    if not settings.GEMINI_API_KEY:
+        parser.error("GEMINI_API_KEY is not set")
+
+    metrics.configure(log_path=settings.METRICS_LOG_PATH)
+    with open(args.profile, encoding="utf-8") as f:
+        try:
+            profile = load_profile(json.load(f))
+        except ValueError as e: # Malformed JSON, or a ProfileValidationError listing every problem
+            parser.error(f"invalid profile {args.profile}: {e}")
+    try:
+        task_profiles = load_task_profiles(settings.TASK_PROFILES_PATH)
+        model_quotas = load_model_quotas(settings.TASK_PROFILES_PATH)
+    except (OSError, ValueError) as e:
+        parser.error(f"invalid task profiles: {e}")
+    try:
+        postings = load_job_descriptions(args.jobs)
+    except (OSError, ValueError) as e:
+        parser.error(f"invalid job descriptions {args.jobs}: {e}")
+    os.makedirs(args.out, exist_ok=True)
+
+    registry = TemplateRegistry(settings.TEMPLATES_DIR, settings.TEMPLATE_BYTECODE_CACHE_DIR, settings.DEFAULT_RESUME_TEMPLATE)
+    if "pdf" in outputs and args.template not in registry.names():
+        parser.error(f"unknown template {args.template!r}; available: {', '.join(registry.names())}")
+    cache = None
+    if settings.RESPONSE_CACHE_ENABLED:
+        cache = ResponseCache(
+            settings.RESPONSE_CACHE_PATH,
+            max_bytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+    client = GeminiClient(
+        settings.GEMINI_API_BASE,
+        settings.GEMINI_MODEL,
+        settings.GEMINI_API_KEY,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.HTTP_READ_TIMEOUT_SECONDS,
+        pool_size=max(settings.HTTP_POOL_SIZE, args.concurrency),
+        max_retries=settings.HTTP_MAX_RETRIES,
+        backoff_base=settings.HTTP_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.HTTP_BACKOFF_MAX_SECONDS,
+        cache=cache,
+        cache_max_temperature=settings.RESPONSE_CACHE_MAX_TEMPERATURE,
+        rate_limiter=build_rate_limiter(
+            args.rpm,
+            args.tpm,
+            shared_path=settings.RATE_LIMIT_PATH if settings.RATE_LIMIT_SHARED else None,
+            model_quotas=model_quotas,
+        ),
+        context_cache=build_context_cache(
+            settings.CONTEXT_CACHE, settings.CONTEXT_CACHE_TTL_SECONDS, settings.CONTEXT_CACHE_MIN_TOKENS
+        ),
+    )
+    pdf_pool = PdfRenderPool(
+        max_workers=settings.PDF_RENDER_WORKERS,
+        timeout_seconds=settings.PDF_RENDER_TIMEOUT_SECONDS,
+        cache=RenderCache(max_bytes=settings.RENDER_CACHE_MAX_MB * 1024 * 1024),
+    )
+    runner = BatchRunner(
+        profile, args.out, client, registry, pdf_pool, args.template, outputs, args.temperature,
+        skill_extractor=SkillExtractor(load_taxonomy(settings.SKILLS_TAXONOMY_PATH)),
+        task_profiles=task_profiles,
+    )
+
+    options = {'outputs': outputs, 'template': args.template, 'temperature': args.temperature, 'prompt_token_budget': settings.PROMPT_TOKEN_BUDGET}
+    already_done = {} if args.force else runner.completed()
+    pending = []
+    skipped = 0
+    for posting in postings:
+        fingerprint = _fingerprint(profile.to_prompt_dict(posting['position'], posting['description']), options)
+        if already_done.get(posting['id']) == fingerprint:
+            skipped += 1
+        else:
+            pending.append((posting, fingerprint))
+    print(f"{len(postings)} postings: {skipped} already done, {len(pending)} to process.")
+
+    started = time.perf_counter()
+    records = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            futures = [executor.submit(runner.run_one, posting, fingerprint) for posting, fingerprint in pending]
+            for future in as_completed(futures):
+                record = future.result()
+                records.append(record)
+                detail = f"{record['timings']['total']:.1f}s" if record['status'] == 'done' else record.get('error')
+                if record.get('keyword_coverage') is not None:
+                    detail += f", {record['keyword_coverage']}% keyword coverage"
+                print(f"[{len(records)}/{len(pending)}] {record['id']}: {record['status']} ({detail})")
+    finally:
+        pdf_pool.shutdown()
+
+    report = {
+        'summary': summarize_report(records, skipped, time.perf_counter() - started),
+        'postings': sorted(records, key=lambda record: record['id']),
+    }
+    _write_atomic(os.path.join(args.out, "report.json"), json.dumps(report, indent=2))
+    # Per-stage timings, token usage and cache counters for the whole run
+    metrics.write_prometheus_file(settings.METRICS_PROMETHEUS_FILE or os.path.join(args.out, "metrics.prom"))
+    summary = report['summary']
+    print(f"Done in {summary['wall_seconds']:.1f}s: {summary['succeeded']} succeeded, {summary['failed']} failed, {skipped} skipped.")
+    for stage, stage_stats in summary['stages'].items():
+        print(f"  {stage:<13} p50 {stage_stats['p50']:.2f}s  p95 {stage_stats['p95']:.2f}s  max {stage_stats['max']:.2f}s")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
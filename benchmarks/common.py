@@ -0,0 +1,62 @@
+"""
+Helpers shared by the benchmark scripts: timing summaries, JSON reports and
+baseline comparison.
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def summarize(samples):
+    """Reduces a list of timings (seconds) to min/median/max."""
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+        "runs": len(samples),
+    }
+
+
+def environment_info():
+    """Describes the machine so stored results can be compared like for like."""
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_json(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_to_baseline(current, baseline, threshold, min_delta=0):
+    """
+    Compares two {metric name: value} dicts where lower is better.
+    Returns a list of (metric, baseline value, current value, ratio) for every
+    metric that got slower/bigger than `threshold` times its baseline, ignoring
+    differences smaller than `min_delta` (noise on very fast measurements).
+    """
+    regressions = []
+    for name, base_value in baseline.items():
+        value = current.get(name)
+        if value is None or not base_value:
+            continue
+        ratio = value / base_value
+        if ratio > threshold and value - base_value >= min_delta:
+            regressions.append((name, base_value, value, ratio))
+    return regressions
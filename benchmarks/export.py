@@ -0,0 +1,220 @@
+"""
+Export-path benchmark: Markdown -> HTML -> PDF and the plain-text export.
+
+Synthetic resumes of increasing size (1 to 30 jobs with long bullet lists) are
+rendered through every layout in the templates directory, timing each stage on
+its own:
+  * html: `markdown.markdown` plus the Jinja template render;
+  * pdf:  pisa converting that HTML (`convert_html_to_pdf`);
+  * text: the plain-text export.
+For each case it reports the median wall time, the peak Python heap during one
+full HTML + PDF export (tracemalloc, measured in a separate untimed run), and
+the output sizes. Everything runs in-process with no network access.
+
+Results are compared against a stored baseline (benchmarks/baselines/export.json
+by default), using each stage's fastest run, and the script exits non-zero when a case got slower or bigger than
+the thresholds allow. Timings are only comparable on similar machines; the
+baseline records the environment it was taken on.
+
+Usage:
+    python benchmarks/export.py [--runs 5] [--sizes 1,5,10,20,30]
+                                [--output export.json] [--update-baseline]
+                                [--baseline path] [--threshold 1.25]
+                                [--memory-threshold 1.25]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from common import REPO_DIR, compare_to_baseline, environment_info, load_json, summarize, write_json
+
+sys.path.insert(0, REPO_DIR)
+
+from pdf_export import convert_html_to_pdf, markdown_to_html, markdown_to_plain_text # noqa: E402
+from template_registry import TemplateRegistry # noqa: E402
+
+DEFAULT_SIZES = (1, 5, 10, 20, 30)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "export.json")
+BULLETS_PER_JOB = (6, 10)
+# Timing differences below this are scheduler noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.025
+
+_VERBS = ["Led", "Designed", "Built", "Migrated", "Automated", "Optimised", "Launched", "Scaled", "Reduced", "Mentored"]
+_OBJECTS = [
+    "the customer-facing billing platform", "a real-time analytics pipeline", "the internal deployment tooling",
+    "a multi-region Kubernetes cluster", "the mobile onboarding flow", "a cross-functional data quality programme",
+    "the legacy reporting stack", "an event-driven order management service", "the public REST and GraphQL APIs",
+]
+_DETAILS = [
+    "working closely with product, design and operations stakeholders across three time zones",
+    "using Python, Django, PostgreSQL and Redis behind an Nginx reverse proxy",
+    "introducing automated testing, CI/CD and observability dashboards in Grafana",
+    "replacing a brittle batch process with streaming jobs on Apache Kafka",
+    "documenting the architecture and running weekly knowledge-sharing sessions",
+]
+_RESULTS = [
+    "cutting p95 latency by **{n}%**", "saving **${n}k** a year in infrastructure costs",
+    "raising conversion by **{n}%**", "processing over **{n},000 transactions daily**",
+    "reducing on-call incidents by **{n}%**", "shortening release cycles from weeks to **{n} days**",
+]
+
+
+def synthetic_resume(job_count, seed=0):
+    """A resume in the Markdown shape the generation prompt asks for, with `job_count` jobs."""
+    rng = random.Random(seed * 1000 + job_count)
+    lines = [
+        "# Alex Example",
+        '<div class="contact-info-line">alex@example.com | <a href="https://linkedin.com/in/alex">LinkedIn</a>| '
+        '<a href="https://alex.example.com">Portfolio</a> | Berlin, Germany</div>',
+        "",
+        "## Summary",
+        "Senior engineer with " + str(job_count + 3) + " years of experience shipping reliable, well-measured "
+        "software for high-traffic products. " + " ".join(rng.choice(_DETAILS).capitalize() + "." for _ in range(3)),
+        "",
+        "## Skills",
+        "- **Languages:** Python, TypeScript, Go, SQL",
+        "- **Platforms:** AWS, Kubernetes, Terraform, PostgreSQL, Redis, Kafka",
+        "- **Practices:** CI/CD, observability, TDD, incident response, mentoring",
+        "",
+        "## Experience",
+    ]
+    for i in range(job_count):
+        start_year = 2024 - 2 * (i + 1)
+        end = "Present" if i == 0 else f"Mar {start_year + 2}"
+        lines += [
+            "",
+            f"### {rng.choice(['Senior', 'Staff', 'Lead', 'Principal'])} Software Engineer",
+            f"**Company {i + 1} GmbH** | Jan {start_year} – {end}",
+            "",
+        ]
+        for _ in range(rng.randint(*BULLETS_PER_JOB)):
+            result = rng.choice(_RESULTS).format(n=rng.randint(10, 90))
+            lines.append(f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)}, {rng.choice(_DETAILS)}, {result}.")
+    lines += [
+        "",
+        "## Education",
+        "### MSc Computer Science",
+        "**Technical University of Example** | 2010 – 2012",
+        "",
+        "## Certifications",
+        "- AWS Certified Solutions Architect – Professional (2023)",
+        "- Certified Kubernetes Administrator (2022)",
+        "",
+        "## Professional Affiliations",
+        "- Association for Computing Machinery (ACM)",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _time(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples), result
+
+
+def _peak_memory(fn):
+    """Peak bytes allocated by Python while running fn once."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_case(template, markdown_text, runs):
+    html_stats, html = _time(lambda: markdown_to_html(markdown_text, template), runs)
+    pdf_stats, pdf = _time(lambda: convert_html_to_pdf(html), runs)
+    text_stats, text = _time(lambda: markdown_to_plain_text(markdown_text), runs)
+    peak = _peak_memory(lambda: convert_html_to_pdf(markdown_to_html(markdown_text, template)))
+    return {
+        "seconds": {"html": html_stats, "pdf": pdf_stats, "text": text_stats},
+        "peak_memory_bytes": peak,
+        "output_bytes": {"markdown": len(markdown_text.encode("utf-8")), "html": len(html.encode("utf-8")),
+                         "pdf": len(pdf), "text": len(text.encode("utf-8"))},
+    }
+
+
+def run(sizes, runs):
+    registry = TemplateRegistry(os.path.join(REPO_DIR, "templates"))
+    cases = {}
+    for name in registry.names():
+        template = registry.get(name)
+        # Warm-up: first use imports markdown/xhtml2pdf and loads pisa's fonts
+        convert_html_to_pdf(markdown_to_html(synthetic_resume(1), template))
+        for size in sizes:
+            cases[f"{name} / {size} jobs"] = measure_case(template, synthetic_resume(size), runs)
+    return cases
+
+
+def _flatten(cases):
+    """Splits a report's cases into {metric: value} dicts for timings and for sizes/memory."""
+    timings, sizes = {}, {}
+    for case, result in cases.items():
+        for stage in ("html", "pdf"):
+            # The fastest run is the least disturbed by other load on the machine
+            timings[f"{case} {stage} seconds"] = result["seconds"][stage]["min"]
+        sizes[f"{case} peak memory"] = result["peak_memory_bytes"]
+        sizes[f"{case} pdf bytes"] = result["output_bytes"]["pdf"]
+    return timings, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="timed repetitions per stage")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated job counts")
+    parser.add_argument("--output", help="write the full JSON report here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="report to compare against ('' to skip)")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown ratio vs the baseline")
+    parser.add_argument("--memory-threshold", type=float, default=1.25,
+                        help="allowed growth ratio of peak memory and PDF size vs the baseline")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    report = {
+        "environment": environment_info(),
+        "runs": args.runs,
+        "cases": run(sizes, args.runs),
+    }
+
+    print(f"{'case':<34}{'html ms':>10}{'pdf ms':>10}{'text ms':>10}{'peak MiB':>10}{'pdf KiB':>10}")
+    for case, result in report["cases"].items():
+        seconds = result["seconds"]
+        print(
+            f"{case:<34}{seconds['html']['median'] * 1000:>10.1f}{seconds['pdf']['median'] * 1000:>10.1f}"
+            f"{seconds['text']['median'] * 1000:>10.3f}{result['peak_memory_bytes'] / 2**20:>10.1f}"
+            f"{result['output_bytes']['pdf'] / 1024:>10.1f}"
+        )
+
+    if args.output:
+        write_json(args.output, report)
+    if args.update_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if args.baseline and os.path.exists(args.baseline):
+        baseline = load_json(args.baseline)
+        if baseline["environment"] != report["environment"]:
+            print("Note: the baseline was recorded on a different environment; timings may not be comparable.")
+        timings, sizes_now = _flatten(report["cases"])
+        base_timings, base_sizes = _flatten(baseline["cases"])
+        regressions = compare_to_baseline(timings, base_timings, args.threshold, MIN_REGRESSION_SECONDS)
+        for name, base_value, value, ratio in regressions:
+            print(f"REGRESSION {name}: {base_value * 1000:.1f} ms -> {value * 1000:.1f} ms ({ratio:.2f}x)")
+        growth = compare_to_baseline(sizes_now, base_sizes, args.memory_threshold)
+        for name, base_value, value, ratio in growth:
+            print(f"REGRESSION {name}: {base_value / 1024:.0f} KiB -> {value / 1024:.0f} KiB ({ratio:.2f}x)")
+        if regressions or growth:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
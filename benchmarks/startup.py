@@ -0,0 +1,125 @@
+"""
+Cold-start benchmark for the Streamlit app.
+
+Every measurement runs in a fresh interpreter so nothing is warm:
+  * import time of each heavy dependency on its own;
+  * time-to-first-render: importing Streamlit's script runner and executing the
+    first run of reumegpt.py (what a new worker does before the page paints);
+  * which heavy modules that first run actually loaded (they should be none of
+    the lazily imported ones).
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--output startup.json]
+                                 [--baseline old.json] [--threshold 1.25]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from common import REPO_DIR, compare_to_baseline, environment_info, load_json, summarize, write_json
+
+APP_PATH = os.path.join(REPO_DIR, "reumegpt.py")
+HEAVY_MODULES = ["requests", "markdown", "jinja2", "xhtml2pdf.pisa", "numpy"]
+
+_IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+_FIRST_RENDER_SNIPPET = """
+import json, os, sys, time
+sys.path.insert(0, {repo_dir!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+framework_ready = time.perf_counter()
+at = AppTest.from_file({app_path!r}, default_timeout=300)
+at.run()
+rendered = time.perf_counter()
+print(json.dumps({{
+    "framework_import": framework_ready - start,
+    "first_run": rendered - framework_ready,
+    "time_to_first_render": rendered - start,
+    "exceptions": [e.value for e in at.exception],
+    "errors": [e.value for e in at.error],
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _run_python(code):
+    env = dict(os.environ)
+    env.setdefault("RESUMEFORGE_CACHE_DIR", os.path.join(REPO_DIR, ".resumeforge_cache", "bench"))
+    # The app stops at an error screen without a key; first render never calls the API
+    env.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=REPO_DIR, env=env
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_imports(runs):
+    timings = {}
+    for module in HEAVY_MODULES:
+        samples = [float(_run_python(_IMPORT_SNIPPET.format(module=module))) for _ in range(runs)]
+        timings[module] = summarize(samples)
+    return timings
+
+
+def measure_first_render(runs):
+    code = _FIRST_RENDER_SNIPPET.format(repo_dir=REPO_DIR, app_path=APP_PATH, heavy=HEAVY_MODULES)
+    samples = [json.loads(_run_python(code)) for _ in range(runs)]
+    for sample in samples:
+        if sample["exceptions"]:
+            raise SystemExit(f"App raised during first render: {sample['exceptions']}")
+        if sample["errors"]:
+            raise SystemExit(f"App stopped at an error during first render: {sample['errors']}")
+    return {
+        "framework_import": summarize([s["framework_import"] for s in samples]),
+        "first_run": summarize([s["first_run"] for s in samples]),
+        "time_to_first_render": summarize([s["time_to_first_render"] for s in samples]),
+        "heavy_modules_loaded": samples[-1]["loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh-process repetitions per measurement")
+    parser.add_argument("--output", help="write the full JSON report here")
+    parser.add_argument("--baseline", help="previous report to compare medians against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown ratio vs the baseline")
+    args = parser.parse_args()
+
+    report = {
+        "environment": environment_info(),
+        "imports": measure_imports(args.runs),
+        "first_render": measure_first_render(args.runs),
+    }
+
+    print(f"{'metric':<32}{'median (ms)':>12}")
+    for module, stats in report["imports"].items():
+        print(f"{'import ' + module:<32}{stats['median'] * 1000:>12.1f}")
+    for name in ("framework_import", "first_run", "time_to_first_render"):
+        print(f"{name:<32}{report['first_render'][name]['median'] * 1000:>12.1f}")
+    loaded = report["first_render"]["heavy_modules_loaded"]
+    print(f"heavy modules loaded by first render: {', '.join(loaded) if loaded else 'none'}")
+
+    if args.output:
+        write_json(args.output, report)
+
+    if args.baseline:
+        baseline = load_json(args.baseline)
+        current = {name: report["first_render"][name]["median"] for name in ("first_run", "time_to_first_render")}
+        previous = {name: baseline["first_render"][name]["median"] for name in current}
+        regressions = compare_to_baseline(current, previous, args.threshold)
+        for name, base_value, value, ratio in regressions:
+            print(f"REGRESSION {name}: {base_value * 1000:.1f} ms -> {value * 1000:.1f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
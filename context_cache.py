@@ -0,0 +1,126 @@
+"""
+Context caching for the prompt prefix shared by a profile's AI calls.
+
+The resume, cover letter, summary, skill and refine prompts all start from the
+same block: the candidate profile and the target job (prompts.build_profile_context).
+The client sends that block as the request's system instruction, and a context
+cache lets it upload the block once per model and refer to it by name after
+that, so follow-up calls only carry their task.
+
+  * `GeminiContextCache` - uploads the block as Gemini cached content.
+  * `LocalContextCache`  - a stand-in that keeps the same bookkeeping in this
+    process but has the client send the block inline, for tests and for
+    endpoints without cached content.
+
+Entries are keyed on a hash of the model and the block's text, so any change to
+the profile or job description makes a new entry and the old one is no longer
+used; it expires upstream `ttl_seconds` after it was created. Blocks below
+`min_tokens` (the API's minimum for cached content) are always sent inline, and
+a block the API refuses to cache is sent inline until its entry would have
+expired, rather than retried on every call.
+"""
+import hashlib
+import threading
+import time
+
+from metrics import metrics
+from prompt_budget import estimate_tokens
+from rate_limit import SingleFlight
+
+# An entry is dropped this many seconds before its upstream expiry, so a name is
+# never handed out just as the API forgets it
+EXPIRY_MARGIN_SECONDS = 60
+
+
+def context_key(model, context):
+    return hashlib.sha256(f"{model}\n{context}".encode("utf-8")).hexdigest()
+
+
+class GeminiContextCache:
+    """Uploads each distinct context once per model as Gemini cached content."""
+
+    # The client sends the context inline instead of referring to the entry
+    inline = False
+
+    def __init__(self, ttl_seconds=900, min_tokens=1024):
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._entries = {} # key -> (name, or None when the API refused it; expires_at)
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def resolve(self, client, model, context):
+        """
+        Returns the name of the cached content holding `context` for `model`,
+        creating it on first use. Returns None when the context should be sent
+        inline (too small, or the API refused to cache it).
+        """
+        if estimate_tokens(context) < self.min_tokens:
+            metrics.inc("resumeforge_context_cache_requests_total", result="too_small")
+            return None
+        key = context_key(model, context)
+        now = time.time()
+        with self._lock:
+            for expired in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[expired]
+            entry = self._entries.get(key)
+        if entry is not None:
+            metrics.inc("resumeforge_context_cache_requests_total", result="hit" if entry[0] else "unavailable")
+            return entry[0]
+        metrics.inc("resumeforge_context_cache_requests_total", result="miss")
+        # Concurrent calls for a new context wait for one upload instead of each making their own
+        return self._flights.do(key, lambda: self._create(client, key, model, context))
+
+    def lookup(self, model, context):
+        """The name of live cached content holding `context` for `model`, or None. Unlike resolve, never uploads."""
+        with self._lock:
+            entry = self._entries.get(context_key(model, context))
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def _create(self, client, key, model, context):
+        name = self._upload(client, model, context)
+        with self._lock:
+            self._entries[key] = (name, time.time() + self.ttl_seconds - EXPIRY_MARGIN_SECONDS)
+        return name
+
+    def _upload(self, client, model, context):
+        from gemini_client import GeminiError
+
+        try:
+            with metrics.span("context_cache_create"):
+                return client.create_cached_content(model, context, self.ttl_seconds)
+        except GeminiError as e:
+            print(f"Context cache upload failed, sending the context inline: {e}")
+            return None
+
+    def discard(self, name):
+        """Forgets an entry the API no longer knows (deleted or expired early)."""
+        with self._lock:
+            for key in [k for k, (entry_name, _) in self._entries.items() if entry_name == name]:
+                del self._entries[key]
+
+
+class LocalContextCache(GeminiContextCache):
+    """Stand-in that tracks contexts like GeminiContextCache but has them sent inline."""
+
+    inline = True
+
+    def _upload(self, client, model, context):
+        return f"local/{context_key(model, context)[:16]}"
+
+
+CONTEXT_CACHES = ("off", "local", "gemini")
+
+
+def build_context_cache(kind, ttl_seconds=900, min_tokens=1024):
+    """Returns the context cache named by `kind` ("gemini", "local"), or None for "off"."""
+    kind = (kind or "off").strip().lower()
+    if kind == "off":
+        return None
+    if kind == "local":
+        return LocalContextCache(ttl_seconds, min_tokens)
+    if kind == "gemini":
+        return GeminiContextCache(ttl_seconds, min_tokens)
+    raise ValueError(f"Unknown context cache {kind!r}; expected one of {', '.join(CONTEXT_CACHES)}")
@@ -0,0 +1,570 @@
+"""
+Shared HTTP client for the Gemini API.
+
+One client is created per process and reused by every session. It keeps a pool
+of keep-alive connections, applies connect/read deadlines to every request, and
+retries transient failures (connection errors, timeouts, 429 and 5xx) with
+jittered exponential backoff, honouring the server's Retry-After header.
+Identical concurrent requests are coalesced into one upstream call, and an
+optional token-bucket limiter queues calls that would exceed the model's API quota.
+Connect time, time to first byte, total latency, token usage and cache results
+are recorded in the metrics registry.
+
+Each call can name a task profile (see task_profiles.py) that sets its output
+cap, sampling, stop sequences, response format and model. An answer that stops
+at the output cap (finishReason MAX_TOKENS) is continued with follow-up calls,
+up to the profile's `max_continuations`, and returned as one text.
+
+A call can also carry a `context`: the profile and job description block shared
+by a profile's calls, sent as the system instruction. With a context cache (see
+context_cache.py) the block is uploaded once as cached content and referenced by
+name; the response cache and call coalescing still key on the full request.
+
+`requests` is imported when the first call is made, not when this module loads,
+to keep it off the app's cold-start path.
+"""
+import email.utils
+import hashlib
+import json
+import random
+import threading
+import time
+
+from metrics import metrics
+from prompt_budget import estimate_tokens
+from rate_limit import FlightAbandoned, RateLimitTimeout, SingleFlight
+from task_profiles import DEFAULT_PROFILE
+from response_cache import make_cache_key
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+# Answers to a request naming cached content the API no longer has (expired or deleted)
+STALE_CONTEXT_STATUS_CODES = (400, 403, 404)
+CONTINUE_PROMPT = (
+    "Continue exactly where your previous answer stopped, mid-sentence if need be. "
+    "Do not repeat anything already written and do not add any preamble."
+)
+
+# Seconds spent opening connections during the current request on this thread
+_connect_timing = threading.local()
+
+
+class GeminiError(Exception):
+    """Raised when the Gemini API cannot be reached or returns an error."""
+
+    def __init__(self, message, status_code=None, details=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+class GeminiResponseFormatError(GeminiError):
+    """Raised when the Gemini API answers with a payload we cannot read."""
+
+
+def build_payload(prompt_text, temperature=0.7, response_mime_type=None, response_schema=None, profile=None, context=None):
+    """
+    Builds the generateContent request body for a single-turn prompt, with the
+    generation settings of `profile` (DEFAULT_PROFILE when None) and `context`,
+    if any, as the system instruction. An explicit mime type or schema
+    overrides the profile's.
+    """
+    profile = profile or DEFAULT_PROFILE
+    payload = {
+        "contents": [
+            {
+                "role": "user",
+                "parts": [{"text": prompt_text}]
+            }
+        ],
+        "generationConfig": profile.generation_config(temperature, response_mime_type, response_schema)
+    }
+    if context:
+        payload["systemInstruction"] = {"parts": [{"text": context}]}
+    return payload
+
+
+def build_continuation_payload(payload, text_so_far):
+    """The request that asks the model to carry on from an answer cut off at its output cap."""
+    return dict(
+        payload,
+        contents=payload["contents"] + [
+            {"role": "model", "parts": [{"text": text_so_far}]},
+            {"role": "user", "parts": [{"text": CONTINUE_PROMPT}]},
+        ],
+    )
+
+
+def extract_text(result):
+    """Returns the text of the first candidate, or None if the response has none."""
+    candidates = result.get('candidates') or []
+    if not candidates:
+        return None
+    parts = (candidates[0].get('content') or {}).get('parts') or []
+    if not parts:
+        return None
+    return parts[0].get('text')
+
+
+def finish_reason(result):
+    """The first candidate's finishReason (e.g. "STOP", "MAX_TOKENS"), or None."""
+    candidates = (result or {}).get('candidates') or []
+    return candidates[0].get('finishReason') if candidates else None
+
+
+def estimate_payload_tokens(payload):
+    """
+    Upper-bound token cost of a request for the rate limiter: the prompt at
+    roughly 4 characters per token plus the full output allowance. The unused
+    part is refunded once the response reports its actual usage.
+    """
+    contents = payload.get('contents', []) + ([payload['systemInstruction']] if 'systemInstruction' in payload else [])
+    prompt_tokens = sum(
+        estimate_tokens(part.get('text', ''))
+        for content in contents
+        for part in content.get('parts', [])
+    )
+    return prompt_tokens + payload.get('generationConfig', {}).get('maxOutputTokens', 0)
+
+
+def _timed_adapter(pool_size):
+    """HTTPAdapter whose connections record how long each TCP + TLS connect takes."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def timed(connection_cls):
+        class TimedConnection(connection_cls):
+            def connect(self):
+                started = time.perf_counter()
+                try:
+                    return super().connect()
+                finally:
+                    _connect_timing.seconds = getattr(_connect_timing, "seconds", 0.0) + time.perf_counter() - started
+        return TimedConnection
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = timed(HTTPConnection)
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = timed(HTTPSConnection)
+
+    class TimedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+    # Retries are handled by _post so Retry-After and jitter apply uniformly
+    return TimedAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+
+
+def record_usage(result, operation):
+    """Adds a response's usageMetadata token counts to the metrics registry."""
+    usage = (result or {}).get('usageMetadata') or {}
+    for kind, field in (
+        ("prompt", "promptTokenCount"), ("cached", "cachedContentTokenCount"),
+        ("response", "candidatesTokenCount"), ("total", "totalTokenCount"),
+    ):
+        metrics.inc("resumeforge_gemini_tokens_total", usage.get(field, 0), operation=operation, kind=kind)
+    if usage:
+        metrics.log("usage", operation=operation, **usage)
+
+
+def _parse_retry_after(value):
+    """Converts a Retry-After header (seconds or HTTP date) into a delay in seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class GeminiClient:
+    """Process-wide Gemini client with connection pooling, deadlines and retries."""
+
+    def __init__(
+        self,
+        api_base,
+        model,
+        api_key,
+        connect_timeout=5.0,
+        read_timeout=90.0,
+        pool_size=20,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=20.0,
+        cache=None,
+        cache_max_temperature=0.2,
+        rate_limiter=None,
+        context_cache=None,
+    ):
+        self.api_base = api_base.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        # Response cache entries are scoped to the key that paid for them, without storing the key itself
+        self.cache_scope = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self.cache_max_temperature = cache_max_temperature
+        self.rate_limiter = rate_limiter
+        self.context_cache = context_cache
+        self._flights = SingleFlight()
+        self._session = None
+        self._pool_size = pool_size
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Lazily creates the pooled requests session shared by all threads."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+
+                    session = requests.Session()
+                    adapter = _timed_adapter(self._pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({'Content-Type': 'application/json'})
+                    self._session = session
+        return self._session
+
+    def model_url(self, method="generateContent", model=None):
+        """Returns the endpoint URL (without the API key) for a model method."""
+        return f"{self.api_base}/models/{model or self.model}:{method}"
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, overridden by the server's Retry-After."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _acquire_quota(self, tokens, model):
+        """Waits for the rate limiter to admit one request of `tokens` tokens to `model`."""
+        if self.rate_limiter is None:
+            return
+        try:
+            waited = self.rate_limiter.acquire(tokens, model=model)
+        except RateLimitTimeout as e:
+            raise GeminiError(str(e), status_code=429) from e
+        if waited:
+            metrics.observe("rate_limit_wait", waited)
+
+    def _refund_quota(self, reserved_tokens, result, model):
+        """Gives back the tokens reserved beyond what the response reports it used."""
+        usage = (result or {}).get('usageMetadata') or {}
+        used_tokens = usage.get('totalTokenCount') or usage.get('promptTokenCount', 0) + usage.get('candidatesTokenCount', 0)
+        if self.rate_limiter is not None and used_tokens:
+            self.rate_limiter.refund(reserved_tokens - used_tokens, model=model)
+
+    def _release_quota(self, tokens, model):
+        """Gives back the whole reservation of an attempt that never reached the API."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.refund(tokens, requests=1, model=model)
+
+    def _post(self, url, payload, params=None, stream=False, tokens=0, operation=None, model=None):
+        """
+        POSTs `payload` with deadlines, retrying transient failures. Every attempt
+        that reaches the API counts against `model`'s quota.
+        """
+        model = model or self.model
+        import requests
+        query = {'key': self.api_key}
+        query.update(params or {})
+        operation = operation or ("stream" if stream else "generate")
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            self._acquire_quota(tokens, model)
+            _connect_timing.seconds = 0.0
+            try:
+                response = self.session.post(url, params=query, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.inc("resumeforge_gemini_requests_total", operation=operation, status="connection_error")
+                if not isinstance(e, requests.exceptions.ReadTimeout):
+                    # A read timeout means the API had the request and may still bill it; otherwise it never arrived
+                    self._release_quota(tokens, model)
+                last_error = GeminiError(f"Failed to connect to AI: {e}")
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff_delay(attempt))
+                    continue
+                raise last_error from e
+            except requests.exceptions.RequestException as e:
+                self._release_quota(tokens, model)
+                raise GeminiError(f"Failed to connect to AI: {e}") from e
+
+            metrics.inc("resumeforge_gemini_requests_total", operation=operation, status=response.status_code)
+            if _connect_timing.seconds:
+                metrics.inc("resumeforge_gemini_connections_total", connection="new")
+                metrics.observe("upstream_connect", _connect_timing.seconds, operation=operation)
+            else:
+                metrics.inc("resumeforge_gemini_connections_total", connection="reused")
+            # requests measures this from sending the request until the headers are parsed
+            metrics.observe("upstream_ttfb", response.elapsed.total_seconds(), operation=operation)
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                response.close()
+                if self.rate_limiter is not None:
+                    self.rate_limiter.refund(tokens, model=model) # rejected requests generate no tokens
+                time.sleep(self._backoff_delay(attempt, retry_after))
+                continue
+            if response.status_code >= 400:
+                details = response.text
+                response.close()
+                raise GeminiError(
+                    f"AI request failed with HTTP {response.status_code}.",
+                    status_code=response.status_code,
+                    details=details,
+                )
+            return response
+        raise last_error
+
+    def generate(self, payload, model=None, reserved_tokens=None):
+        """
+        Calls generateContent and returns the decoded JSON response. `reserved_tokens`
+        overrides the payload's estimated cost (e.g. for a request whose context is cached).
+        """
+        reserved_tokens = reserved_tokens or estimate_payload_tokens(payload)
+        # upstream_total covers quota waits and retries, i.e. the latency the caller sees
+        with metrics.span("upstream_total", operation="generate"):
+            response = self._post(self.model_url("generateContent", model), payload, tokens=reserved_tokens, model=model)
+        with metrics.span("response_parse", response="envelope"):
+            try:
+                result = response.json()
+            except ValueError as e:
+                raise GeminiResponseFormatError("AI response was not valid JSON.", details=response.text) from e
+        record_usage(result, "generate")
+        self._refund_quota(reserved_tokens, result, model or self.model)
+        return result
+
+    def create_cached_content(self, model, context, ttl_seconds):
+        """Uploads `context` as a system instruction cached for `model`; returns the cached content's name."""
+        body = {
+            "model": f"models/{model}",
+            "systemInstruction": {"parts": [{"text": context}]},
+            "ttl": f"{int(ttl_seconds)}s",
+        }
+        response = self._post(f"{self.api_base}/cachedContents", body, operation="cache_create", model=model)
+        try:
+            name = response.json().get('name')
+        except (ValueError, AttributeError) as e:
+            raise GeminiResponseFormatError("Cached content response was not valid JSON.", details=response.text) from e
+        if not name:
+            raise GeminiResponseFormatError("Cached content response had no name.", details=response.text)
+        return name
+
+    def has_cached_context(self, context, profile=None):
+        """
+        Whether calls with `context` for the model of `profile` would refer to
+        cached content made earlier, instead of sending the context inline.
+        """
+        if self.context_cache is None or self.context_cache.inline:
+            return False
+        return self.context_cache.lookup((profile or DEFAULT_PROFILE).model or self.model, context) is not None
+
+    def _with_cached_context(self, payload, model):
+        """
+        The request to send for `payload`: its system instruction replaced by a
+        reference to cached content when the context cache has (or can make) one.
+        """
+        if self.context_cache is None or 'systemInstruction' not in payload:
+            return payload
+        context = payload['systemInstruction']['parts'][0]['text']
+        name = self.context_cache.resolve(self, model or self.model, context)
+        if name is None or self.context_cache.inline:
+            return payload
+        request = {key: value for key, value in payload.items() if key != 'systemInstruction'}
+        request['cachedContent'] = name
+        return request
+
+    def _generate_in_context(self, payload, model):
+        """generate() for a payload whose context may be served from the context cache."""
+        request = self._with_cached_context(payload, model)
+        try:
+            return self.generate(request, model, reserved_tokens=estimate_payload_tokens(payload))
+        except GeminiError as e:
+            if request is payload or e.status_code not in STALE_CONTEXT_STATUS_CODES:
+                raise
+            self.context_cache.discard(request['cachedContent'])
+            return self.generate(payload, model)
+
+    def _stream_in_context(self, payload, model):
+        """stream() for a payload whose context may be served from the context cache."""
+        request = self._with_cached_context(payload, model)
+        try:
+            yield from self.stream(request, model, reserved_tokens=estimate_payload_tokens(payload))
+        except GeminiError as e:
+            # HTTP errors are raised before the first event, so nothing was yielded yet
+            if request is payload or e.status_code not in STALE_CONTEXT_STATUS_CODES:
+                raise
+            self.context_cache.discard(request['cachedContent'])
+            yield from self.stream(payload, model)
+
+    def _cache_lookup(self, payload, use_cache, temperature, model=None):
+        """Returns (cache or None, cache key, cached text or None) and counts the lookup."""
+        cache = self.cache if use_cache and temperature <= self.cache_max_temperature else None
+        cache_key = make_cache_key(self.model_url(model=model), payload, scope=self.cache_scope)
+        if cache is None:
+            metrics.inc("resumeforge_cache_requests_total", cache="response", result="bypass")
+            return None, cache_key, None
+        cached_text = cache.get(cache_key)
+        metrics.inc("resumeforge_cache_requests_total", cache="response", result="miss" if cached_text is None else "hit")
+        return cache, cache_key, cached_text
+
+    def generate_text(
+        self, prompt_text, temperature=0.7, response_mime_type=None, use_cache=True, response_schema=None, profile=None, context=None
+    ):
+        """
+        Generates text for a single prompt with the settings of the task `profile`
+        and the shared `context`, if any, serving identical low-temperature requests
+        from the response cache when one is configured. Identical calls already in
+        flight share that call's answer.
+        """
+        profile = profile or DEFAULT_PROFILE
+        payload = build_payload(prompt_text, temperature, response_mime_type, response_schema, profile, context)
+        cache, cache_key, cached_text = self._cache_lookup(payload, use_cache, temperature, profile.model)
+        if cached_text is not None:
+            return cached_text
+
+        def call():
+            text = ""
+            request = payload
+            for attempt in range(profile.max_continuations + 1):
+                if attempt:
+                    metrics.inc("resumeforge_gemini_continuations_total", task=profile.name)
+                result = self._generate_in_context(request, profile.model)
+                more = extract_text(result)
+                if more is None:
+                    raise GeminiResponseFormatError("AI response format was unexpected.", details=result)
+                text += more
+                if finish_reason(result) != "MAX_TOKENS":
+                    break
+                request = build_continuation_payload(payload, text)
+            else:
+                metrics.inc("resumeforge_gemini_truncated_total", task=profile.name)
+            if cache is not None:
+                cache.set(cache_key, text)
+            return text
+
+        while True:
+            flight, is_leader = self._flights.join(cache_key)
+            if is_leader:
+                break
+            metrics.inc("resumeforge_gemini_coalesced_total")
+            try:
+                return flight.wait()
+            except FlightAbandoned:
+                continue # the shared stream was cancelled by its owner; make our own call
+        try:
+            text = call()
+        except BaseException as e:
+            self._flights.finish(cache_key, flight, error=e if isinstance(e, Exception) else FlightAbandoned())
+            raise
+        self._flights.finish(cache_key, flight, result=text)
+        return text
+
+    def stream(self, payload, model=None, reserved_tokens=None):
+        """Calls streamGenerateContent over SSE and yields each decoded event."""
+        import requests
+        reserved_tokens = reserved_tokens or estimate_payload_tokens(payload)
+        started = time.perf_counter()
+        response = self._post(
+            self.model_url("streamGenerateContent", model), payload, params={'alt': 'sse'}, stream=True, tokens=reserved_tokens, model=model
+        )
+        last_event = None
+        first_event = True
+        outcome = "error"
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if not data or data == '[DONE]':
+                    continue
+                try:
+                    last_event = json.loads(data)
+                except ValueError as e:
+                    raise GeminiResponseFormatError("AI stream contained an invalid event.", details=data) from e
+                if first_event:
+                    first_event = False
+                    metrics.observe("upstream_first_chunk", time.perf_counter() - started, operation="stream")
+                yield last_event
+            outcome = "ok"
+        except requests.exceptions.RequestException as e:
+            raise GeminiError(f"AI stream was interrupted: {e}") from e
+        except GeneratorExit:
+            outcome = "cancelled"
+            raise
+        finally:
+            response.close()
+            metrics.observe("upstream_total", time.perf_counter() - started, operation="stream", outcome=outcome)
+        # The final event carries the usage for the whole stream
+        record_usage(last_event, "stream")
+        self._refund_quota(reserved_tokens, last_event, model or self.model)
+
+    def stream_text(
+        self, prompt_text, temperature=0.7, response_mime_type=None, use_cache=True, response_schema=None, profile=None, context=None
+    ):
+        """
+        Streaming counterpart of generate_text: yields text chunks as they arrive,
+        continuing into follow-up streams when the answer stops at its output cap.
+        A cached response is yielded as a single chunk, and a completed stream is
+        written back to the cache under the same key generate_text uses. A caller
+        that joins an identical call already in flight waits for it and receives
+        the whole answer as a single chunk.
+        """
+        profile = profile or DEFAULT_PROFILE
+        payload = build_payload(prompt_text, temperature, response_mime_type, response_schema, profile, context)
+        cache, cache_key, cached_text = self._cache_lookup(payload, use_cache, temperature, profile.model)
+        if cached_text is not None:
+            yield cached_text
+            return
+
+        while True:
+            flight, is_leader = self._flights.join(cache_key)
+            if is_leader:
+                break
+            metrics.inc("resumeforge_gemini_coalesced_total")
+            try:
+                yield flight.wait()
+                return
+            except FlightAbandoned:
+                continue
+
+        chunks = []
+        outcome = {'error': FlightAbandoned()}
+        try:
+            request = payload
+            for attempt in range(profile.max_continuations + 1):
+                if attempt:
+                    metrics.inc("resumeforge_gemini_continuations_total", task=profile.name)
+                last_event = None
+                for event in self._stream_in_context(request, profile.model):
+                    last_event = event
+                    text = extract_text(event)
+                    if text:
+                        chunks.append(text)
+                        yield text
+                if finish_reason(last_event) != "MAX_TOKENS":
+                    break
+                request = build_continuation_payload(payload, "".join(chunks))
+            else:
+                metrics.inc("resumeforge_gemini_truncated_total", task=profile.name)
+            if not chunks:
+                raise GeminiResponseFormatError("AI response format was unexpected.", details="empty stream")
+            outcome = {'result': "".join(chunks)}
+            if cache is not None:
+                cache.set(cache_key, outcome['result'])
+        except Exception as e:
+            outcome = {'error': e}
+            raise
+        finally:
+            # Runs on success, on error, and when the consumer stops iterating early
+            self._flights.finish(cache_key, flight, **outcome)
@@ -0,0 +1,158 @@
+"""
+Background job queue for AI calls.
+
+Streamlit runs each script rerun on a server thread; an AI call made inline
+holds that thread (and freezes the session) for the whole upstream latency.
+`JobQueue` runs those calls on a bounded, process-wide thread pool instead: a
+button submits a job and its script run finishes at once, the page polls the
+job's status, and the result is picked up by a later run.
+
+Jobs are identified by id and expose a status, a result (or the exception the
+call raised) and, for streamed calls, the text received so far. Queued jobs can
+be cancelled outright; a running stream stops reading at its next chunk, and
+any other running call has its result discarded. Finished jobs are forgotten
+`job_retention_seconds` after they end.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_TIMEOUT = "timeout"
+FINISHED_JOB_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED, JOB_TIMEOUT)
+
+
+class JobCancelled(Exception):
+    """Raised by `JobQueue.result` for a job that was cancelled."""
+
+
+class JobQueue:
+    """Runs submitted calls on a thread pool and keeps their status and results by job id."""
+
+    def __init__(self, max_workers=8, job_retention_seconds=600.0, thread_name_prefix="job"):
+        self.job_retention_seconds = job_retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._jobs = {} # job id -> job dict
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs) and returns the job id."""
+        return self._submit(fn, args, kwargs, stream=False)
+
+    def submit_stream(self, fn, *args, **kwargs):
+        """
+        Queues a call whose result arrives in pieces: fn(*args, **kwargs) returns
+        an iterable of text chunks, readable through `partial` while it runs. The
+        job's result is the joined text.
+        """
+        return self._submit(fn, args, kwargs, stream=True)
+
+    def _submit(self, fn, args, kwargs, stream):
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": JOB_QUEUED,
+            "submitted_at": now,
+            "finished_at": None,
+            "chunks": [] if stream else None,
+            "result": None,
+            "error": None,
+            "future": None,
+        }
+        with self._lock:
+            self._prune(now)
+            self._jobs[job["id"]] = job
+            job["future"] = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job["id"]
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if job["status"] != JOB_QUEUED:
+                return
+            job["status"] = JOB_RUNNING
+        try:
+            if job["chunks"] is None:
+                result = fn(*args, **kwargs)
+            else:
+                stream = iter(fn(*args, **kwargs))
+                try:
+                    for chunk in stream:
+                        with self._lock:
+                            if job["status"] == JOB_CANCELLED:
+                                return
+                            job["chunks"].append(chunk)
+                finally:
+                    close = getattr(stream, "close", None)
+                    if close is not None:
+                        close() # Ends the upstream response when the stream was stopped early
+                result = "".join(job["chunks"])
+        except Exception as e:
+            self._finish(job, JOB_FAILED, error=e)
+            return
+        self._finish(job, JOB_DONE, result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            if job["status"] in FINISHED_JOB_STATES:
+                return
+            job.update(status=status, result=result, error=error, finished_at=time.time())
+        metrics.inc("resumeforge_ai_jobs_total", status=status)
+        metrics.observe("ai_job", job["finished_at"] - job["submitted_at"], outcome="ok" if status == JOB_DONE else "error")
+
+    def _prune(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED_JOB_STATES and now - (job["finished_at"] or now) > self.job_retention_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def status(self, job_id):
+        """Returns the job's state; None for unknown or expired ids."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job["status"] if job is not None else None
+
+    def partial(self, job_id):
+        """Text a streamed job has produced so far ("" for unknown jobs and unstreamed calls)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return "".join(job["chunks"]) if job is not None and job["chunks"] else ""
+
+    def result(self, job_id):
+        """
+        Returns a finished job's result, or None while it is queued or running.
+        Re-raises the exception of a failed job; raises JobCancelled for a
+        cancelled one and KeyError for unknown or expired ids.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            status, result, error = job["status"], job["result"], job["error"]
+        if status == JOB_DONE:
+            return result
+        if status == JOB_FAILED:
+            raise error
+        if status == JOB_CANCELLED:
+            raise JobCancelled(f"Job {job_id} was cancelled.")
+        return None
+
+    def cancel(self, job_id):
+        """Cancels a job that has not finished yet. Returns False if it already had."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_JOB_STATES:
+                return False
+            job["future"].cancel()
+            job.update(status=JOB_CANCELLED, finished_at=time.time())
+        metrics.inc("resumeforge_ai_jobs_total", status=JOB_CANCELLED)
+        return True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,221 @@
+"""
+Per-stage latency and usage instrumentation.
+
+Every stage of the generation pipeline (prompt assembly, the upstream Gemini
+call, response parsing, Markdown conversion, template rendering, pisa) records
+a timing span into a process-wide registry, alongside counters for token usage,
+cache hits and misses, and upstream requests.
+
+The registry can be exported three ways, all off by default:
+- structured logs: one JSON object per span or event, appended to a file or stderr;
+- a Prometheus text-format file, rewritten periodically (node_exporter textfile collector);
+- a Prometheus `/metrics` HTTP endpoint on a separate port.
+
+Spans are recorded in the process that runs them; PDF workers return their pisa
+timing with the PDF so it is recorded by the app process.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+STAGE_METRIC = "resumeforge_stage_seconds"
+# Seconds; spans sub-millisecond local stages up to slow upstream calls
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+COUNTER_HELP = {
+    "resumeforge_cache_requests_total": "Cache lookups by cache and result (hit, miss, bypass).",
+    "resumeforge_gemini_requests_total": "Upstream Gemini HTTP attempts by operation and status code.",
+    "resumeforge_gemini_tokens_total": "Gemini tokens reported by usageMetadata, by operation and kind.",
+    "resumeforge_gemini_coalesced_total": "Gemini calls answered by an identical call already in flight.",
+    "resumeforge_gemini_connections_total": "Upstream HTTP attempts by connection (new or reused).",
+    "resumeforge_gemini_continuations_total": "Follow-up calls continuing answers cut off at their output cap, by task.",
+    "resumeforge_gemini_truncated_total": "Answers still cut off at their output cap after every continuation, by task.",
+    "resumeforge_speculative_calls_total": "Prefetched AI calls by result (started, used, wasted).",
+    "resumeforge_context_cache_requests_total": "Shared-context lookups by result (hit, miss, unavailable, too_small).",
+    "resumeforge_pdf_jobs_total": "Finished PDF render jobs by final status.",
+    "resumeforge_pdf_restarts_total": "PDF render jobs restarted after another job's timeout recycled the workers.",
+    "resumeforge_ai_jobs_total": "Finished background AI jobs by final status.",
+}
+
+logger = logging.getLogger("resumeforge.metrics")
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    """Thread-safe registry of stage histograms and counters."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {} # label key -> [bucket counts..., sum, count]
+        self._counters = {} # (name, label key) -> value
+        self._log_enabled = False
+        self._configured = False
+
+    def observe(self, stage, seconds, **labels):
+        """Records one duration for a pipeline stage."""
+        key = _label_key(dict(labels, stage=stage))
+        with self._lock:
+            row = self._histograms.get(key)
+            if row is None:
+                row = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    row[i] += 1
+            row[-2] += seconds
+            row[-1] += 1
+        self.log("span", stage=stage, seconds=round(seconds, 6), **labels)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """Times the enclosed block as `stage`; the outcome label records whether it raised."""
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, outcome=outcome, **labels)
+
+    def timed(self, stage, **labels):
+        """Decorator form of span()."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def inc(self, name, amount=1, **labels):
+        """Adds `amount` to a counter."""
+        if not amount:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def log(self, event, **fields):
+        """Emits one structured log record when logging is configured."""
+        if self._log_enabled:
+            logger.info(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str))
+
+    def snapshot(self):
+        """Returns {'stages': {label key: (count, sum)}, 'counters': {(name, label key): value}}."""
+        with self._lock:
+            return {
+                'stages': {key: (row[-1], row[-2]) for key, row in self._histograms.items()},
+                'counters': dict(self._counters),
+            }
+
+    def render_prometheus(self):
+        """The registry in Prometheus text exposition format."""
+        with self._lock:
+            histograms = {key: list(row) for key, row in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = [
+            f"# HELP {STAGE_METRIC} Duration of generation pipeline stages.",
+            f"# TYPE {STAGE_METRIC} histogram",
+        ]
+        for key, row in sorted(histograms.items()):
+            for bound, count in zip(self.buckets, row):
+                lines.append(f"{STAGE_METRIC}_bucket{_format_labels(key, [('le', repr(bound))])} {count}")
+            lines.append(f"{STAGE_METRIC}_bucket{_format_labels(key, [('le', '+Inf')])} {row[-1]}")
+            lines.append(f"{STAGE_METRIC}_sum{_format_labels(key)} {row[-2]:.6f}")
+            lines.append(f"{STAGE_METRIC}_count{_format_labels(key)} {row[-1]}")
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# HELP {name} {COUNTER_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, key), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path):
+        """Atomically rewrites `path` with the current registry."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Writing metrics file failed: {e}")
+
+    def configure(self, log_path=None, prometheus_file=None, flush_seconds=15.0, http_port=0):
+        """
+        Turns on the exporters. `log_path` of "-" logs to stderr. Safe to call
+        more than once; each exporter is only started the first time.
+        """
+        with self._lock:
+            if self._configured:
+                return
+            self._configured = True
+        if log_path:
+            handler = logging.StreamHandler(sys.stderr) if log_path == "-" else logging.FileHandler(log_path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            self._log_enabled = True
+        if prometheus_file:
+            def flush_forever():
+                while True:
+                    time.sleep(flush_seconds)
+                    self.write_prometheus_file(prometheus_file)
+            threading.Thread(target=flush_forever, name="metrics-file", daemon=True).start()
+        if http_port:
+            self._serve_http(http_port)
+
+    def _serve_http(self, port):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+        except OSError as e:
+            # Another process (e.g. a second Streamlit worker) already serves this port
+            print(f"Metrics endpoint not started on port {port}: {e}")
+            return
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+
+# The process-wide registry every module records into
+metrics = Metrics()
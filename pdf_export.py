@@ -0,0 +1,430 @@
+"""
+Markdown -> HTML -> PDF export with a shared render cache.
+
+pisa (xhtml2pdf) is by far the most expensive thing the app does locally, so the
+rendered HTML and PDF bytes are memoised on a hash of the resume Markdown plus
+the template identity. The cache is bounded in memory and can optionally spill
+PDFs to a directory on disk so they survive restarts.
+
+markdown and xhtml2pdf are imported on first use rather than at import time, so
+app start-up does not pay for them in sessions that never export a PDF.
+"""
+import hashlib
+import importlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+
+from job_queue import FINISHED_JOB_STATES, JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_TIMEOUT
+from metrics import metrics
+
+
+class PdfRenderError(Exception):
+    """Raised when xhtml2pdf cannot convert the HTML to PDF."""
+
+
+def render_cache_key(markdown_text, template_id):
+    """Key for one rendering: the Markdown content hash plus the template identity."""
+    digest = hashlib.sha256()
+    digest.update(template_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(markdown_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def markdown_to_html(markdown_text, template):
+    """Converts AI-generated Markdown to HTML and renders it into a resume template."""
+    import markdown # Imported on first export to keep it off the cold-start path
+    # Note: The 'markdown' library passes through the HTML <div> we asked the AI to output.
+    with metrics.span("markdown_convert"):
+        html_from_markdown = markdown.markdown(markdown_text)
+    with metrics.span("template_render"):
+        return template.render(html_content=html_from_markdown)
+
+
+def markdown_to_plain_text(markdown_text):
+    """Strips Markdown bolding/links so the resume pastes cleanly into Word/Docs."""
+    # The AI-generated content is already Markdown, which is essentially plain text
+    return markdown_text.replace('**', '').replace('*', '').replace('[', '').replace(']', '')
+
+
+def convert_html_to_pdf(source_html):
+    """Converts an HTML string to PDF bytes."""
+    # xhtml2pdf drags in reportlab, html5lib, pyHanko, svglib... so it is only loaded once a PDF is requested
+    from xhtml2pdf import pisa
+    result_file = BytesIO()
+    pisa_status = pisa.CreatePDF(source_html, dest=result_file)
+    if pisa_status.err:
+        raise PdfRenderError(f"PDF creation error: {pisa_status.err}")
+    return result_file.getvalue()
+
+
+class RenderCache:
+    """
+    Thread-safe LRU cache of rendered HTML and PDF bytes, bounded by total size.
+    When `spill_dir` is set, PDFs are also written there and looked up on a memory miss.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, spill_dir=None, max_spill_bytes=256 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = int(max_spill_bytes)
+        self._entries = OrderedDict() # key -> {"html": str or None, "pdf": bytes or None}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def _entry_size(entry):
+        return len(entry.get("html") or "") + len(entry.get("pdf") or b"")
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.pdf")
+
+    def get(self, key, kind):
+        """Returns the cached "html" or "pdf" for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.get(kind) is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc("resumeforge_cache_requests_total", cache=f"render_{kind}", result="hit")
+                return entry[kind]
+        if kind == "pdf" and self.spill_dir:
+            try:
+                with open(self._spill_path(key), "rb") as f:
+                    pdf_bytes = f.read()
+                os.utime(self._spill_path(key)) # keep recently used files out of the disk LRU
+            except OSError:
+                pdf_bytes = None
+            if pdf_bytes:
+                self.put(key, "pdf", pdf_bytes, spill=False)
+                with self._lock:
+                    self.hits += 1
+                metrics.inc("resumeforge_cache_requests_total", cache="render_pdf_disk", result="hit")
+                return pdf_bytes
+        with self._lock:
+            self.misses += 1
+        metrics.inc("resumeforge_cache_requests_total", cache=f"render_{kind}", result="miss")
+        return None
+
+    def put(self, key, kind, value, spill=True):
+        """Stores a rendered "html" or "pdf" value, evicting least-recently-used entries."""
+        with self._lock:
+            entry = self._entries.pop(key, None) or {}
+            self._size -= self._entry_size(entry)
+            entry[kind] = value
+            entry_size = self._entry_size(entry)
+            if entry_size <= self.max_bytes:
+                self._entries[key] = entry
+                self._size += entry_size
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= self._entry_size(evicted)
+        if kind == "pdf" and spill and self.spill_dir:
+            self._spill(key, value)
+
+    def _spill(self, key, pdf_bytes):
+        """Writes a PDF to the spill directory and trims the directory to its size budget."""
+        path = self._spill_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, path)
+            files = []
+            for name in os.listdir(self.spill_dir):
+                if name.endswith(".pdf"):
+                    stat = os.stat(os.path.join(self.spill_dir, name))
+                    files.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in files)
+            for _, size, name in sorted(files):
+                if total <= self.max_spill_bytes:
+                    break
+                os.remove(os.path.join(self.spill_dir, name))
+                total -= size
+        except OSError as e:
+            print(f"PDF spill to disk failed: {e}")
+
+    def stats(self):
+        """Returns entry count, in-memory bytes and hit/miss counters."""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+def render_resume_html(markdown_text, template, template_id, cache=None):
+    """Returns the template-rendered HTML for a resume, using the cache when given."""
+    key = render_cache_key(markdown_text, template_id)
+    if cache is not None:
+        html = cache.get(key, "html")
+        if html is not None:
+            return html
+    html = markdown_to_html(markdown_text, template)
+    if cache is not None:
+        cache.put(key, "html", html)
+    return html
+
+
+def render_resume_pdf(markdown_text, template, template_id, cache=None):
+    """
+    Returns the PDF bytes for a resume rendered with `template`.
+    Repeat calls with the same Markdown and template are served from the cache.
+    """
+    key = render_cache_key(markdown_text, template_id)
+    if cache is not None:
+        pdf_bytes = cache.get(key, "pdf")
+        if pdf_bytes is not None:
+            return pdf_bytes
+    html = render_resume_html(markdown_text, template, template_id, cache)
+    with metrics.span("pdf_render"):
+        pdf_bytes = convert_html_to_pdf(html)
+    if cache is not None:
+        cache.put(key, "pdf", pdf_bytes)
+    return pdf_bytes
+
+
+# --- Off-thread rendering ---
+
+def _warm_pdf_worker():
+    """Pays the xhtml2pdf import once per worker process instead of on its first job."""
+    importlib.import_module("xhtml2pdf.pisa")
+
+
+def _render_pdf_worker(source_html):
+    """
+    Runs in a pool process: HTML in, (PDF bytes, seconds spent in pisa) out.
+    The timing travels back with the PDF because the worker has its own metrics registry.
+    """
+    started = time.perf_counter()
+    pdf_bytes = convert_html_to_pdf(source_html)
+    return pdf_bytes, time.perf_counter() - started
+
+
+class PdfRenderPool:
+    """
+    Renders PDFs in a bounded pool of worker processes so pisa never runs on a
+    Streamlit script thread and concurrent sessions use separate cores.
+
+    Jobs are identified by id and expose a status; they can be cancelled, and a
+    watchdog thread times out any job still running past its timeout, whether or
+    not anyone is polling it. Identical jobs (same Markdown and template) that are
+    still in flight share one render, and finished PDFs are handed to the render
+    cache.
+
+    A process pool cannot stop one task, so a timeout terminates all the workers.
+    The other jobs caught in that are restarted on fresh workers: queued jobs
+    keep their place for free, while a running job loses its progress and uses
+    up its one retry, failing if it is interrupted again.
+    """
+
+    def __init__(self, max_workers=2, timeout_seconds=60.0, cache=None, job_retention_seconds=600.0):
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.cache = cache
+        self.job_retention_seconds = job_retention_seconds
+        self._executor = None
+        self._jobs = {} # job id -> job dict
+        self._lock = threading.RLock()
+        self._watchdog = None
+        self._closed = threading.Event()
+
+    def _get_executor(self):
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # forkserver/spawn avoid forking a multi-threaded Streamlit server
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_warm_pdf_worker,
+            )
+        return self._executor
+
+    def _recycle_executor(self):
+        """
+        Terminates the worker processes (e.g. one stuck on a timed-out job) and
+        restarts the pool's other unfinished jobs on fresh workers.
+        """
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        interrupted = [
+            job for job in self._jobs.values()
+            if job["status"] in (JOB_QUEUED, JOB_RUNNING) and job["future"] is not None and not job["future"].done()
+        ]
+        for job in interrupted:
+            job["future"] = None # _on_done ignores the futures the shutdown cancels or breaks
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for job in interrupted:
+            if job["status"] == JOB_QUEUED:
+                job["attempts"] -= 1 # It never started, so the restart is free
+            elif job["attempts"] >= 2:
+                job.update(status=JOB_FAILED, error="PDF rendering was interrupted by another job's timeout.", finished_at=time.time(), html=None)
+                metrics.inc("resumeforge_pdf_jobs_total", status=JOB_FAILED)
+                continue
+            job["status"] = JOB_QUEUED
+            metrics.inc("resumeforge_pdf_restarts_total")
+            self._start(job)
+
+    def _start(self, job):
+        job["attempts"] += 1
+        future = self._get_executor().submit(_render_pdf_worker, job["html"])
+        job["future"] = future
+        job["deadline"] = None
+        future.add_done_callback(lambda f, job_id=job["id"]: self._on_done(job_id, f))
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name="pdf-render-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        """Watchdog loop: enforces job deadlines until the pool shuts down."""
+        interval = min(1.0, max(0.05, self.timeout_seconds / 10))
+        while not self._closed.wait(interval):
+            self._check_deadlines()
+
+    def _check_deadlines(self):
+        """Starts the clock on jobs a worker picked up and times out those past their deadline."""
+        now = time.time()
+        with self._lock:
+            timed_out = False
+            for job in self._jobs.values():
+                if job["status"] == JOB_QUEUED and job["future"] is not None and job["future"].running():
+                    job["status"] = JOB_RUNNING
+                    job["deadline"] = now + self.timeout_seconds
+                elif job["status"] == JOB_RUNNING and job["deadline"] and now > job["deadline"]:
+                    job.update(status=JOB_TIMEOUT, error=f"PDF rendering took longer than {self.timeout_seconds:.0f}s.", finished_at=now, html=None)
+                    metrics.inc("resumeforge_pdf_jobs_total", status=JOB_TIMEOUT)
+                    timed_out = True
+            if timed_out:
+                self._recycle_executor()
+
+    def _on_done(self, job_id, future):
+        from concurrent.futures.process import BrokenProcessPool
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["future"] is not future or job["status"] in FINISHED_JOB_STATES:
+                return
+            if future.cancelled():
+                job["status"] = JOB_CANCELLED
+                return
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool) and job["attempts"] < 2:
+                # A worker died; drop the broken pool and run this job again once
+                if self._executor is not None and getattr(self._executor, "_broken", False):
+                    self._executor = None
+                self._start(job)
+                return
+            job["finished_at"] = time.time()
+            if error is not None:
+                job["status"] = JOB_FAILED
+                job["error"] = str(error)
+                metrics.inc("resumeforge_pdf_jobs_total", status=JOB_FAILED)
+                return
+            job["status"] = JOB_DONE
+            job["result"], render_seconds = future.result()
+            job["html"] = None
+        metrics.inc("resumeforge_pdf_jobs_total", status=JOB_DONE)
+        metrics.observe("pdf_render", render_seconds, outcome="ok")
+        metrics.observe("pdf_job", job["finished_at"] - job["submitted_at"])
+        if self.cache is not None:
+            self.cache.put(job["key"], "pdf", job["result"])
+
+    def _prune(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED_JOB_STATES and now - (job["finished_at"] or now) > self.job_retention_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, markdown_text, template, template_id):
+        """Queues a render and returns its job id. Cache hits complete immediately."""
+        key = render_cache_key(markdown_text, template_id)
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            for job in self._jobs.values():
+                if job["key"] == key and job["status"] in (JOB_QUEUED, JOB_RUNNING):
+                    return job["id"]
+            job = {
+                "id": uuid.uuid4().hex,
+                "key": key,
+                "status": JOB_QUEUED,
+                "submitted_at": now,
+                "finished_at": None,
+                "future": None,
+                "attempts": 0,
+                "deadline": None,
+                "html": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job["id"]] = job
+            cached_pdf = self.cache.get(key, "pdf") if self.cache is not None else None
+            if cached_pdf is not None:
+                job.update(status=JOB_DONE, result=cached_pdf, finished_at=now)
+                return job["id"]
+        try:
+            # Markdown + Jinja are cheap next to pisa, so only the PDF step leaves this process
+            html = render_resume_html(markdown_text, template, template_id, self.cache)
+        except Exception as e:
+            with self._lock:
+                job.update(status=JOB_FAILED, error=str(e), finished_at=time.time())
+            return job["id"]
+        with self._lock:
+            job["html"] = html
+            self._start(job)
+        return job["id"]
+
+    def status(self, job_id):
+        """Returns the job's state; None for unknown or expired ids."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else job["status"]
+
+    def result(self, job_id):
+        """Returns the PDF bytes of a finished job; raises PdfRenderError for failed, cancelled or timed-out jobs."""
+        status = self.status(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if status == JOB_DONE:
+                return job["result"]
+            if status in (JOB_QUEUED, JOB_RUNNING):
+                return None
+            raise PdfRenderError((job or {}).get("error") or f"PDF job {status}.")
+
+    def wait(self, job_id, poll_interval=0.1):
+        """Blocks until a job finishes and returns its PDF bytes (raises PdfRenderError on failure)."""
+        while self.status(job_id) in (JOB_QUEUED, JOB_RUNNING):
+            time.sleep(poll_interval)
+        return self.result(job_id)
+
+    def cancel(self, job_id):
+        """Cancels a job. A queued job is dropped; a running job's result is discarded."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_JOB_STATES:
+                return False
+            if job["future"] is not None:
+                job["future"].cancel()
+            job.update(status=JOB_CANCELLED, error="PDF job cancelled.", finished_at=time.time(), html=None)
+            metrics.inc("resumeforge_pdf_jobs_total", status=JOB_CANCELLED)
+            return True
+
+    def shutdown(self):
+        self._closed.set()
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,305 @@
+"""
+Typed profile data model and its versioned JSON format.
+
+A profile is held as frozen, slotted dataclasses rather than ad hoc dicts: entries
+are compact, dates are parsed once when the data is loaded or entered (never on
+each rerun), and every field has one name. Saved files carry a `schema_version`;
+`load_profile` validates and migrates any supported version in a single pass and
+reports every problem at once.
+
+Schema versions:
+  1 - the original "Download All Data" format: no version field, list keys
+      'work experience' / 'Educational Experience' / 'Certifications' /
+      'Professional Affiliations', end_date "Present" for a current role, 'GPA'.
+  2 - snake_case list keys, end_date null for a current role, 'gpa'.
+
+`Profile.to_prompt_dict` produces the `var_for_ai` dict the prompt builders take.
+It keeps the version 1 key names and entry shapes, so prompts, section
+fingerprints and response cache keys are unchanged by the model.
+"""
+import datetime
+from dataclasses import dataclass
+
+SCHEMA_VERSION = 2
+
+WORK_MODES = ("Work from Home", "Onsite", "Hybrid")
+ROLE_LOCATIONS = ("Onsite", "Remote", "Hybrid")
+DEGREES = ("BSc", "ND", "HND", "MSc", "PhD", "Other")
+
+# Saved-file key of each Profile list field, per schema version
+_LIST_KEYS = {
+    1: {'work': 'work experience', 'education': 'Educational Experience',
+        'certifications': 'Certifications', 'affiliations': 'Professional Affiliations'},
+    2: {'work': 'work_experience', 'education': 'education',
+        'certifications': 'certifications', 'affiliations': 'affiliations'},
+}
+_TEXT_FIELDS = ('name', 'mail', 'linkedin', 'portfolio_link_website', 'position', 'description', 'summary', 'tech')
+PRESENT = "Present"
+
+
+class ProfileValidationError(ValueError):
+    """Raised when saved profile data cannot be loaded; `errors` lists every problem found."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+def _date_str(value):
+    return value.isoformat() if value else ""
+
+
+@dataclass(frozen=True, slots=True)
+class WorkEntry:
+    job: str = ""
+    organization: str = ""
+    location: str = "Onsite"
+    start_date: datetime.date = None
+    end_date: datetime.date = None # None while this is the current role
+    responsibilities: str = ""
+    projects: str = ""
+
+    @property
+    def is_current(self):
+        return self.end_date is None
+
+    def to_dict(self):
+        return {
+            'job': self.job, 'organization': self.organization, 'location': self.location,
+            'start_date': _date_str(self.start_date), 'end_date': _date_str(self.end_date) or None,
+            'responsibilities': self.responsibilities, 'projects': self.projects,
+        }
+
+    def to_prompt_dict(self):
+        return {
+            'job': self.job, 'organization': self.organization, 'location': self.location,
+            'start_date': _date_str(self.start_date), 'end_date': _date_str(self.end_date) or PRESENT,
+            'responsibilities': self.responsibilities, 'projects': self.projects,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class EducationEntry:
+    school: str = ""
+    course: str = ""
+    degree: str = "BSc"
+    grad_date: datetime.date = None
+    gpa: float = 0.0
+
+    def to_dict(self):
+        return {'school': self.school, 'grad_date': _date_str(self.grad_date), 'degree': self.degree,
+                'course': self.course, 'gpa': self.gpa}
+
+    def to_prompt_dict(self):
+        return {'school': self.school, 'grad_date': _date_str(self.grad_date), 'degree': self.degree,
+                'course': self.course, 'GPA': self.gpa}
+
+
+@dataclass(frozen=True, slots=True)
+class Certification:
+    title: str = ""
+    link: str = ""
+    date: datetime.date = None
+    description: str = ""
+
+    def to_dict(self):
+        return {'title': self.title, 'link': self.link, 'date': _date_str(self.date), 'description': self.description}
+
+    to_prompt_dict = to_dict
+
+
+@dataclass(frozen=True, slots=True)
+class Affiliation:
+    body: str = ""
+    date: datetime.date = None
+
+    def to_dict(self):
+        return {'body': self.body, 'date': _date_str(self.date)}
+
+    to_prompt_dict = to_dict
+
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    name: str = ""
+    mail: str = ""
+    linkedin: str = ""
+    portfolio_link_website: str = ""
+    location: str = "Work from Home"
+    position: str = ""
+    description: str = ""
+    summary: str = ""
+    tech: str = ""
+    work: tuple = ()
+    education: tuple = ()
+    certifications: tuple = ()
+    affiliations: tuple = ()
+
+    def to_dict(self):
+        """The profile in the current saved-file format."""
+        return {'schema_version': SCHEMA_VERSION, **self.to_fields(PROFILE_FIELDS)}
+
+    def to_fields(self, names):
+        """{saved-file key: JSON-ready value} for the named attributes only."""
+        list_keys = _LIST_KEYS[SCHEMA_VERSION]
+        data = {}
+        for name in names:
+            value = getattr(self, name)
+            if name in list_keys:
+                data[list_keys[name]] = [entry.to_dict() for entry in value]
+            else:
+                data[name] = value
+        return data
+
+    def to_prompt_dict(self, position=None, description=None):
+        """
+        The `var_for_ai` dict the prompt builders take. `position`/`description`
+        override the profile's own (e.g. to target another job posting).
+        """
+        return {
+            'name': self.name,
+            'mail': self.mail,
+            'linkedin': self.linkedin,
+            'portfolio_link_website': self.portfolio_link_website,
+            'location': self.location,
+            'position': position if position is not None else self.position,
+            'description': description if description is not None else self.description,
+            'summary': self.summary,
+            'tech': self.tech,
+            'work experience': [entry.to_prompt_dict() for entry in self.work],
+            'Educational Experience': [entry.to_prompt_dict() for entry in self.education],
+            'Certifications': [entry.to_prompt_dict() for entry in self.certifications],
+            'Professional Affiliations': [entry.to_prompt_dict() for entry in self.affiliations],
+        }
+
+
+PROFILE_FIELDS = _TEXT_FIELDS + ('location',) + tuple(_LIST_KEYS[SCHEMA_VERSION])
+
+
+def changed_fields(old, new):
+    """Names of the Profile attributes that differ between two profiles."""
+    # Unchanged entries are the same objects in both, so list comparisons stay cheap
+    return [name for name in PROFILE_FIELDS if getattr(old, name) != getattr(new, name)]
+
+
+# --- Loading: validation and migration in one pass ---
+
+class _Reader:
+    """Reads fields out of one saved dict, collecting errors instead of stopping at the first."""
+
+    def __init__(self, data, path, errors):
+        self.data = data
+        self.path = path
+        self.errors = errors
+
+    def error(self, key, message):
+        self.errors.append(f"{self.path}{key}: {message}")
+
+    def text(self, key, default=""):
+        value = self.data.get(key)
+        if value is None:
+            return default
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if not isinstance(value, str):
+            self.error(key, f"expected text, got {type(value).__name__}")
+            return default
+        return value
+
+    def choice(self, key, options, default):
+        value = self.text(key, default) or default
+        if value not in options:
+            self.error(key, f"must be one of {', '.join(options)}, got {value!r}")
+            return default
+        return value
+
+    def date(self, key, allow_present=False):
+        value = self.data.get(key)
+        if value in (None, "") or (allow_present and value == PRESENT):
+            return None
+        if isinstance(value, datetime.date):
+            return value
+        try:
+            return datetime.date.fromisoformat(str(value)[:10])
+        except ValueError:
+            self.error(key, f"expected a YYYY-MM-DD date, got {value!r}")
+            return None
+
+    def number(self, key, default=0.0):
+        value = self.data.get(key, default)
+        try:
+            return float(value if value not in (None, "") else default)
+        except (TypeError, ValueError):
+            self.error(key, f"expected a number, got {value!r}")
+            return default
+
+
+def _read_work(r, version):
+    return WorkEntry(
+        job=r.text('job'),
+        organization=r.text('organization'),
+        location=r.choice('location', ROLE_LOCATIONS, "Onsite"),
+        start_date=r.date('start_date'),
+        end_date=r.date('end_date', allow_present=True),
+        responsibilities=r.text('responsibilities'),
+        projects=r.text('projects'),
+    )
+
+
+def _read_education(r, version):
+    return EducationEntry(
+        school=r.text('school'),
+        course=r.text('course'),
+        degree=r.choice('degree', DEGREES, "BSc"),
+        grad_date=r.date('grad_date'),
+        gpa=r.number('GPA' if version == 1 else 'gpa'),
+    )
+
+
+def _read_certification(r, version):
+    return Certification(title=r.text('title'), link=r.text('link'), date=r.date('date'), description=r.text('description'))
+
+
+def _read_affiliation(r, version):
+    return Affiliation(body=r.text('body'), date=r.date('date'))
+
+
+_ENTRY_READERS = {
+    'work': _read_work,
+    'education': _read_education,
+    'certifications': _read_certification,
+    'affiliations': _read_affiliation,
+}
+
+
+def load_profile(data):
+    """
+    Validates and migrates saved profile data of any supported schema version in
+    one pass. Returns a Profile, or raises ProfileValidationError listing every
+    problem found. Missing fields take their defaults.
+    """
+    if not isinstance(data, dict):
+        raise ProfileValidationError(["profile: expected a JSON object"])
+    version = data.get('schema_version', 1)
+    if version not in _LIST_KEYS:
+        raise ProfileValidationError([f"schema_version: unsupported version {version!r} (this app reads 1 to {SCHEMA_VERSION})"])
+
+    errors = []
+    top = _Reader(data, "", errors)
+    fields = {key: top.text(key) for key in _TEXT_FIELDS}
+    fields['location'] = top.choice('location', WORK_MODES, "Work from Home")
+    for field_name, key in _LIST_KEYS[version].items():
+        raw_entries = data.get(key) or []
+        if not isinstance(raw_entries, list):
+            top.error(key, "expected a list")
+            raw_entries = []
+        entries = []
+        for i, raw in enumerate(raw_entries):
+            if not isinstance(raw, dict):
+                errors.append(f"{key}[{i}]: expected an object")
+                continue
+            entries.append(_ENTRY_READERS[field_name](_Reader(raw, f"{key}[{i}].", errors), version))
+        fields[field_name] = tuple(entries)
+    if errors:
+        raise ProfileValidationError(errors)
+    return Profile(**fields)
@@ -0,0 +1,260 @@
+"""
+Server-side profile store with debounced, incremental autosave.
+
+Profiles are kept in SQLite, one row per top-level field (the same keys as the
+saved JSON file, values JSON-encoded), so an edit rewrites only the fields it
+touched: changing the summary writes a few hundred bytes, not the whole career
+history. Each profile has an id (used in the app's ?profile=<id> link, which
+restores the session instantly on reconnect), a user-facing name and an owner:
+the unguessable token of the browser that created it. Listing, loading,
+renaming and deleting only see the caller's own profiles, so neither the
+picker nor a shared link hands one user's profile to another.
+
+`ProfileAutosaver` sits between a session and the store: every rerun hands it
+the current Profile, and it writes the changed fields once the session has been
+quiet for `delay_seconds`. The writes of every autosaver are made by one
+long-lived worker thread (`AutosaveWorker`).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from profile_model import PROFILE_FIELDS, SCHEMA_VERSION, changed_fields, load_profile
+
+
+class ProfileStore:
+    """Named profiles persisted in a SQLite file, readable and writable field by field."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profiles (
+                    id TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL DEFAULT '',
+                    name TEXT NOT NULL,
+                    schema_version INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profile_fields (
+                    profile_id TEXT NOT NULL REFERENCES profiles (id) ON DELETE CASCADE,
+                    field TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (profile_id, field)
+                )
+                """
+            )
+            # Stores made before profiles had owners: their profiles keep an empty owner, which no browser has
+            if "owner" not in [row[1] for row in conn.execute("PRAGMA table_info(profiles)")]:
+                conn.execute("ALTER TABLE profiles ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE INDEX IF NOT EXISTS profiles_owner ON profiles (owner, updated_at)")
+
+    def _connect(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def list_profiles(self, owner):
+        """Returns [(id, name, updated_at)] of `owner`'s profiles, most recently updated first."""
+        try:
+            return self._connect().execute(
+                "SELECT id, name, updated_at FROM profiles WHERE owner = ? ORDER BY updated_at DESC", (owner,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Profile store read failed: {e}")
+            return []
+
+    def create(self, owner, name, profile):
+        """Stores a new profile of `owner` with every field; returns its id, or None on failure."""
+        profile_id = uuid.uuid4().hex
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT INTO profiles (id, owner, name, schema_version, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (profile_id, owner, name, SCHEMA_VERSION, now, now),
+                )
+                self._write_fields(conn, profile_id, profile.to_fields(PROFILE_FIELDS))
+            return profile_id
+        except sqlite3.Error as e:
+            print(f"Profile store write failed: {e}")
+            return None
+
+    def load(self, owner, profile_id):
+        """
+        Returns (name, Profile), or None if `owner` has no profile with this id or
+        the stored data is invalid. Profiles stored under an older schema are
+        migrated and rewritten.
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT name, schema_version FROM profiles WHERE id = ? AND owner = ?", (profile_id, owner)
+            ).fetchone()
+            if row is None:
+                return None
+            name, version = row
+            data = {'schema_version': version}
+            for field, value in conn.execute("SELECT field, value FROM profile_fields WHERE profile_id = ?", (profile_id,)):
+                data[field] = json.loads(value)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Profile store read failed: {e}")
+            return None
+        try:
+            profile = load_profile(data)
+        except ValueError as e:
+            print(f"Stored profile {profile_id} is invalid: {e}")
+            return None
+        if version != SCHEMA_VERSION:
+            self.save_fields(profile_id, profile.to_fields(PROFILE_FIELDS), replace=True)
+        return name, profile
+
+    def save_fields(self, profile_id, fields, replace=False):
+        """
+        Writes the given {saved-file key: value} fields of a profile. With
+        `replace`, fields not given are removed (used after a schema migration).
+        Returns True on success.
+        """
+        try:
+            with self._transaction() as conn:
+                updated = conn.execute(
+                    "UPDATE profiles SET updated_at = ?, schema_version = ? WHERE id = ?",
+                    (time.time(), SCHEMA_VERSION, profile_id),
+                ).rowcount
+                if not updated:
+                    return False # Deleted meanwhile (e.g. from another tab)
+                if replace:
+                    conn.execute("DELETE FROM profile_fields WHERE profile_id = ?", (profile_id,))
+                self._write_fields(conn, profile_id, fields)
+            return True
+        except sqlite3.Error as e:
+            print(f"Profile store write failed: {e}")
+            return False
+
+    def _write_fields(self, conn, profile_id, fields):
+        conn.executemany(
+            "INSERT OR REPLACE INTO profile_fields (profile_id, field, value) VALUES (?, ?, ?)",
+            [(profile_id, field, json.dumps(value, separators=(',', ':'), ensure_ascii=False)) for field, value in fields.items()],
+        )
+
+    def rename(self, owner, profile_id, name):
+        try:
+            self._connect().execute("UPDATE profiles SET name = ? WHERE id = ? AND owner = ?", (name, profile_id, owner))
+        except sqlite3.Error as e:
+            print(f"Profile store write failed: {e}")
+
+    def delete(self, owner, profile_id):
+        try:
+            self._connect().execute("DELETE FROM profiles WHERE id = ? AND owner = ?", (profile_id, owner))
+        except sqlite3.Error as e:
+            print(f"Profile store write failed: {e}")
+
+
+class AutosaveWorker:
+    """
+    One daemon thread that flushes each scheduled autosaver once its delay has
+    passed, so edits never start a thread (or a SQLite connection) of their own.
+    """
+
+    def __init__(self):
+        self._due = {} # autosaver -> time.monotonic() at which to flush it
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, autosaver, delay_seconds):
+        """Flushes `autosaver` after `delay_seconds`, replacing any earlier schedule for it."""
+        with self._condition:
+            self._due[autosaver] = time.monotonic() + delay_seconds
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-autosave", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, autosaver):
+        with self._condition:
+            self._due.pop(autosaver, None)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    ready = [autosaver for autosaver, due in self._due.items() if due <= now]
+                    if ready:
+                        break
+                    self._condition.wait(min(self._due.values()) - now if self._due else None)
+                for autosaver in ready:
+                    del self._due[autosaver]
+            for autosaver in ready:
+                try:
+                    autosaver.flush()
+                except Exception as e:
+                    print(f"Profile autosave failed: {e}")
+
+
+_autosave_worker = AutosaveWorker()
+
+
+class ProfileAutosaver:
+    """Debounced autosave of one session's profile, writing only the fields that changed."""
+
+    def __init__(self, store, profile_id, saved_profile, delay_seconds=2.0, worker=None):
+        self.store = store
+        self.profile_id = profile_id
+        self.delay_seconds = delay_seconds
+        self._worker = worker or _autosave_worker
+        self._saved = saved_profile
+        self._pending = None
+        self._lock = threading.Lock() # Guards _saved and _pending; never held during a write
+        self._write_lock = threading.Lock() # Keeps writes in order when a flush overlaps the worker's
+
+    def update(self, profile):
+        """Schedules `profile` to be saved once no further update arrives for delay_seconds."""
+        with self._lock:
+            if profile == (self._pending if self._pending is not None else self._saved):
+                return
+            self._pending = profile
+        self._worker.schedule(self, self.delay_seconds)
+
+    def flush(self):
+        """Writes any pending changes now."""
+        self._worker.cancel(self)
+        with self._write_lock:
+            with self._lock:
+                profile, self._pending = self._pending, None
+                saved = self._saved
+            if profile is None:
+                return
+            names = changed_fields(saved, profile)
+            if not names or self.store.save_fields(self.profile_id, profile.to_fields(names)):
+                with self._lock:
+                    self._saved = profile
@@ -0,0 +1,191 @@
+"""
+Token budget for generation prompts.
+
+Long careers make the resume prompt large, which makes every generation slower
+and more expensive. This module estimates a prompt's size locally, scores each
+profile entry against the job description (TF-IDF cosine similarity), and trims
+the least relevant material until the rendered prompt fits the budget. The order
+is: condense long entries, drop the least relevant work experience,
+certifications and affiliations, then shorten the job description and
+free-text fields.
+
+NumPy is imported on first use so it stays off the app's cold-start path.
+"""
+import json
+import math
+import re
+
+# Roughly 4 characters per token for English prose, matching Gemini's guidance
+CHARS_PER_TOKEN = 4
+# Work entries are never dropped below this many (the most relevant ones are kept)
+MIN_WORK_ENTRIES = 2
+# Character limits for condensed free-text fields: first pass, then last resort
+CONDENSED_CHARS = 400
+MINIMAL_CHARS = 150
+# The job description is never shortened below this
+MIN_DESCRIPTION_CHARS = 600
+
+_WORK_TEXT_FIELDS = ('responsibilities', 'projects')
+_LABELS = {'work experience': "work experience", 'Certifications': "certification", 'Professional Affiliations': "affiliation"}
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to was we were will with "
+    "you your they i my me us he she them who what which when where how all any can do into not so than then there".split()
+)
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def estimate_tokens(text):
+    """Cheap local estimate of a text's token count."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_json(value):
+    """JSON without indentation or padding, for embedding in prompts."""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def _terms(text):
+    return [term for term in _TOKEN_RE.findall(text.lower()) if term not in _STOPWORDS]
+
+
+def relevance_scores(query, documents):
+    """Cosine similarity between `query` and each document over TF-IDF vectors."""
+    if not documents:
+        return []
+    import numpy as np
+
+    rows = [_terms(document) for document in documents] + [_terms(query)]
+    vocabulary = {}
+    for terms in rows:
+        for term in terms:
+            vocabulary.setdefault(term, len(vocabulary))
+    if not vocabulary or not rows[-1]:
+        return [0.0] * len(documents)
+    counts = np.vstack([
+        np.bincount(np.fromiter((vocabulary[t] for t in terms), dtype=np.intp, count=len(terms)), minlength=len(vocabulary))
+        for terms in rows
+    ]).astype(float)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(rows)) / (1 + document_frequency)) + 1
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    weights /= norms
+    return (weights[:-1] @ weights[-1]).tolist()
+
+
+def entry_text(entry):
+    """Flattens a profile entry (dict) into text for scoring."""
+    if isinstance(entry, dict):
+        return " ".join(str(value) for value in entry.values() if value)
+    return str(entry)
+
+
+def condense_text(text, query, max_chars):
+    """
+    Shortens `text` to about `max_chars` by keeping its sentences most relevant
+    to `query`, in their original order.
+    """
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return text
+    sentences = [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+    scores = relevance_scores(query, sentences)
+    kept, used = set(), 0
+    for i in sorted(range(len(sentences)), key=lambda i: (-scores[i], i)):
+        if used + len(sentences[i]) > max_chars and kept:
+            continue
+        kept.add(i)
+        used += len(sentences[i]) + 1
+    condensed = " ".join(sentences[i] for i in sorted(kept))
+    if len(condensed) > max_chars:
+        condensed = condensed[:max_chars].rsplit(" ", 1)[0] + "…"
+    return condensed
+
+
+def _truncate(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+def fit_to_budget(var_for_ai, render, budget_tokens):
+    """
+    Trims a copy of `var_for_ai` until `render(profile)` fits `budget_tokens`.
+    Returns (profile, report); the input is never modified. The report lists what
+    was condensed, dropped or truncated, and whether the budget was met (it
+    cannot be when the fixed prompt instructions alone exceed it).
+    """
+    original_tokens = estimate_tokens(render(var_for_ai))
+    report = {'budget': budget_tokens, 'original_tokens': original_tokens, 'final_tokens': original_tokens,
+              'condensed': [], 'dropped': [], 'truncated': [], 'fits': True}
+    if not budget_tokens or original_tokens <= budget_tokens:
+        return var_for_ai, report
+
+    profile = dict(var_for_ai)
+    for key in ('work experience', 'Certifications', 'Professional Affiliations'):
+        profile[key] = list(profile[key])
+    profile['work experience'] = [dict(job) for job in profile['work experience']]
+    query = " ".join([profile['position'], profile['description']])
+
+    def tokens():
+        return estimate_tokens(render(profile))
+
+    def ranked(key):
+        """Entries of a list field, least relevant first."""
+        entries = profile[key]
+        scores = relevance_scores(query, [entry_text(entry) for entry in entries])
+        return [entries[i] for i in sorted(range(len(entries)), key=lambda i: scores[i])]
+
+    def condense_jobs(max_chars):
+        for job in ranked('work experience'):
+            changed = False
+            for field in _WORK_TEXT_FIELDS:
+                value = job.get(field) or ""
+                if len(value) > max_chars:
+                    job[field] = condense_text(value, query, max_chars)
+                    changed = True
+            if changed:
+                report['condensed'].append(f"{job.get('job', '')} at {job.get('organization', '')}")
+                yield
+
+    def drop_least_relevant(limits):
+        """Drops entries of the given list fields, least relevant first across all of them."""
+        candidates = [(key, entry) for key in limits for entry in profile[key]]
+        scores = relevance_scores(query, [entry_text(entry) for _, entry in candidates])
+        for i in sorted(range(len(candidates)), key=lambda i: scores[i]):
+            key, entry = candidates[i]
+            if len(profile[key]) <= limits[key]:
+                continue
+            profile[key].remove(entry)
+            report['dropped'].append(f"{_LABELS[key]}: {entry_text(entry)[:60]}")
+            yield
+
+    def truncate_field(key, min_chars):
+        over = tokens() - budget_tokens
+        value = profile[key] or ""
+        target = max(min_chars, len(value) - over * CHARS_PER_TOKEN)
+        if target < len(value):
+            profile[key] = _truncate(value, target)
+            report['truncated'].append(key)
+        yield
+
+    steps = [
+        condense_jobs(CONDENSED_CHARS),
+        drop_least_relevant({'work experience': MIN_WORK_ENTRIES, 'Certifications': 0, 'Professional Affiliations': 0}),
+        condense_jobs(MINIMAL_CHARS),
+        truncate_field('description', MIN_DESCRIPTION_CHARS),
+        truncate_field('summary', MINIMAL_CHARS),
+        truncate_field('tech', MINIMAL_CHARS),
+        drop_least_relevant({'work experience': 1}),
+        truncate_field('description', MINIMAL_CHARS),
+    ]
+    for step in steps:
+        for _ in step:
+            if tokens() <= budget_tokens:
+                report['final_tokens'] = tokens()
+                return profile, report
+    report['final_tokens'] = tokens()
+    report['fits'] = report['final_tokens'] <= budget_tokens
+    return profile, report
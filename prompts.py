@@ -0,0 +1,339 @@
+"""
+Prompt construction for every AI feature.
+
+These builders only depend on plain data (the `var_for_ai` profile dict and
+strings), so they can be used from the Streamlit UI, from worker threads and
+from headless tools alike.
+"""
+import json
+import re
+
+import prompt_budget
+from metrics import metrics
+
+
+def parse_skill_list(text):
+    """Splits a comma-separated skill list returned by the AI."""
+    return [s.strip() for s in text.split(',') if s.strip()]
+
+
+def missing_resume_fields(var_for_ai):
+    """Returns the human-readable names of fields required to generate a resume."""
+    missing_fields = []
+    if not var_for_ai['name']: missing_fields.append("Full Name")
+    if not var_for_ai['mail']: missing_fields.append("Email Address")
+    if not var_for_ai['position']: missing_fields.append("Position Applying For")
+    if not var_for_ai['description']: missing_fields.append("Job Description")
+    if not var_for_ai['summary']: missing_fields.append("Career Goal/Summary")
+    if not var_for_ai['tech']: missing_fields.append("Technical Skills")
+
+    if not var_for_ai['work experience']: missing_fields.append("at least one Work Experience")
+    if not var_for_ai['Educational Experience']: missing_fields.append("at least one Education entry")
+    return missing_fields
+
+
+def missing_cover_letter_fields(var_for_ai):
+    """Returns the human-readable names of fields required to generate a cover letter."""
+    cl_missing_fields = []
+    if not var_for_ai['name']: cl_missing_fields.append("Full Name")
+    if not var_for_ai['mail']: cl_missing_fields.append("Email Address")
+    if not var_for_ai['position']: cl_missing_fields.append("Position Applying For")
+    if not var_for_ai['description']: cl_missing_fields.append("Job Description")
+    if not var_for_ai['summary']: cl_missing_fields.append("Career Goal/Summary")
+    return cl_missing_fields
+
+
+@metrics.timed("prompt_assembly", prompt="bullets")
+def build_bullets_prompt(target_position, current_responsibilities, current_projects):
+    """Prompt that rewrites one role's responsibilities/projects as quantified bullets."""
+    return f"""
+    You are an expert resume bullet point writer. Take the following raw job responsibilities and projects
+    and rewrite them into 3-5 concise, **achievement-oriented bullet points**.
+    **Crucially, incorporate quantifiable results and metrics where appropriate. If specific numbers are not available, invent plausible but realistic numbers/percentages (e.g., 'increased X by 15%', 'reduced Y by 20%', 'managed $10K budget').**
+    Use strong action verbs and focus on impact and results.
+    The target position is "{target_position}".
+
+    Responsibilities:
+    {current_responsibilities}
+
+    Projects:
+    {current_projects}
+
+    Return only the bullet points, formatted as a markdown unordered list.
+    Example:
+    - Spearheaded content strategy for social media platforms, resulting in a **25% growth in followers** and a **15% increase in engagement**.
+    - Managed the end-to-end content creation and distribution process for the Nigerian 2023 elections, ensuring timely and accurate information dissemination to **over 1 million viewers**.
+    """
+
+
+# --- Bulk bullet enhancement ---
+# Every role's bullets are rewritten in one structured request: a JSON array of
+# roles in, a JSON array of {id, bullets} out.
+
+# Output allowance per role (3-5 bullets) when deciding how many roles fit one request
+BULK_BULLETS_TOKENS_PER_ROLE = 300
+
+BULK_BULLETS_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "STRING"},
+            "bullets": {"type": "STRING"},
+        },
+        "required": ["id", "bullets"],
+    },
+}
+
+
+def bulk_bullet_roles(job_entries):
+    """
+    The roles of a work-experience list worth enhancing, as the plain dicts the
+    bulk prompt takes; each role's id is its index in the list.
+    """
+    return [
+        {
+            "id": str(i),
+            "job": entry.job,
+            "organization": entry.organization,
+            "responsibilities": entry.responsibilities,
+            "projects": entry.projects,
+        }
+        for i, entry in enumerate(job_entries)
+        if entry.responsibilities.strip() or entry.projects.strip()
+    ]
+
+
+def chunk_bulk_roles(roles, token_budget, max_output_tokens):
+    """
+    Splits roles into batches that each fit one request: the roles' estimated
+    prompt tokens stay under `token_budget` (0 for no limit) and their answers
+    under `max_output_tokens`. A role too large for the budget gets a batch of its own.
+    """
+    per_batch = max(1, max_output_tokens // BULK_BULLETS_TOKENS_PER_ROLE)
+    room = token_budget - prompt_budget.estimate_tokens(_bulk_bullets_prompt_text("", [])) if token_budget else None
+    batches, batch, used = [], [], 0
+    for role in roles:
+        cost = prompt_budget.estimate_tokens(prompt_budget.compact_json(role))
+        if batch and (len(batch) >= per_batch or (room is not None and used + cost > room)):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(role)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+@metrics.timed("prompt_assembly", prompt="bullets_bulk")
+def build_bulk_bullets_prompt(target_position, roles):
+    """Prompt that rewrites several roles' responsibilities/projects as quantified bullets in one answer."""
+    return _bulk_bullets_prompt_text(target_position, roles)
+
+
+def _bulk_bullets_prompt_text(target_position, roles):
+    return f"""
+    You are an expert resume bullet point writer. For each role below, take its raw responsibilities and projects
+    and rewrite them into 3-5 concise, **achievement-oriented bullet points**.
+    **Crucially, incorporate quantifiable results and metrics where appropriate. If specific numbers are not available, invent plausible but realistic numbers/percentages (e.g., 'increased X by 15%', 'reduced Y by 20%', 'managed $10K budget').**
+    Use strong action verbs and focus on impact and results. Keep each role's bullets about that role only.
+    The target position is "{target_position}".
+
+    Roles (JSON array):
+    {prompt_budget.compact_json(roles)}
+
+    Return a JSON array with one object per role: "id" is the role's id, unchanged, and "bullets" is
+    its bullet points as a markdown unordered list (one "- " line per bullet).
+    """
+
+
+def parse_bulk_bullets_response(text, role_ids):
+    """
+    Returns {role id: bullets} for the entries of a bulk answer that are valid:
+    a requested id with at least one "- " bullet line. Other entries are left
+    out, so the caller can tell which roles were not enhanced. Raises ValueError
+    when the answer is not a JSON array.
+    """
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    data = json.loads(cleaned)
+    if isinstance(data, dict): # Tolerate the array wrapped in an object
+        data = next((value for value in data.values() if isinstance(value, list)), None)
+    if not isinstance(data, list):
+        raise ValueError("AI response is not a list of roles.")
+
+    wanted = set(role_ids)
+    enhanced = {}
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        role_id, bullets = str(item.get("id", "")), item.get("bullets")
+        if role_id not in wanted or role_id in enhanced or not isinstance(bullets, str):
+            continue
+        lines = [line.strip() for line in bullets.strip().splitlines() if line.strip()]
+        if lines and any(line.startswith(("- ", "* ")) for line in lines):
+            enhanced[role_id] = "\n".join(lines)
+    return enhanced
+
+
+# --- Shared profile context ---
+# The candidate profile and target job are the same for every call made for one
+# version of the profile, so they form a stable prefix (sent as the system
+# instruction, and cached upstream by the context cache) and the prompts below
+# only carry their task. The summary and skill prompts need only a few fields, so
+# they have a self-contained form too, used unless the context is already cached.
+
+@metrics.timed("prompt_assembly", prompt="context")
+def build_profile_context(var_for_ai, token_budget=None):
+    """
+    The candidate profile and target job shared by the resume, cover letter,
+    summary, skill and refine prompts. With a `token_budget`, the least relevant
+    profile material is trimmed to fit it.
+    """
+    if token_budget:
+        var_for_ai, _ = prompt_budget.fit_to_budget(var_for_ai, _profile_context_text, token_budget)
+    return _profile_context_text(var_for_ai)
+
+
+def _profile_context_text(var_for_ai):
+    return f"""
+    You are an expert resume and cover letter writer helping a candidate apply for a job.
+    The candidate's profile and the target job are below; every request that follows refers to them.
+
+    Candidate Profile:
+    Name: {var_for_ai['name']}
+    Email: {var_for_ai['mail']}
+    LinkedIn: {var_for_ai['linkedin']}
+    Portfolio: {var_for_ai['portfolio_link_website']}
+    Location: {var_for_ai['location']}
+    Career Summary: {var_for_ai['summary']}
+    Technical Skills (from user): {var_for_ai['tech']}
+    Work Experience (from user, summarize key points for AI to expand): {prompt_budget.compact_json(var_for_ai['work experience'])}
+    Education (from user): {prompt_budget.compact_json(var_for_ai['Educational Experience'])}
+    Certifications (from user): {prompt_budget.compact_json(var_for_ai['Certifications'])}
+    Professional Affiliations (from user): {prompt_budget.compact_json(var_for_ai['Professional Affiliations'])}
+
+    Target Position: {var_for_ai['position']}
+    Job Description:
+    {var_for_ai['description']}
+    """
+
+
+@metrics.timed("prompt_assembly", prompt="summary")
+def build_summary_prompt(current_summary, target_position, job_description):
+    """Prompt that tailors the career summary to the target job description."""
+    return f"""
+    You are an expert resume writer. Refine the following career summary to be highly
+    tailored and impactful for a "{target_position}" role, based on the provided job description.
+    Focus on aligning the summary with key requirements and keywords from the job description.
+    Keep it concise (2-4 sentences).
+
+    Current Career Summary:
+    {current_summary}
+
+    Target Position: {target_position}
+
+    Job Description:
+    {job_description}
+
+    Provide only the refined career summary.
+    """
+
+
+@metrics.timed("prompt_assembly", prompt="summary")
+def build_summary_prompt_in_context():
+    """build_summary_prompt for a call whose profile context is already cached upstream."""
+    return """
+    Refine the candidate's career summary to be highly tailored and impactful for the target position,
+    based on the job description. Focus on aligning the summary with key requirements and keywords
+    from the job description. Keep it concise (2-4 sentences).
+
+    Provide only the refined career summary.
+    """
+
+
+@metrics.timed("prompt_assembly", prompt="skills")
+def build_skills_prompt(position, description):
+    """Prompt that suggests 10-15 skills for the job description."""
+    return f"""
+    Based on the following job description for a {position} role, suggest a list of 10-15 highly relevant
+    technical and soft skills. Provide them as a comma-separated list.
+
+    Job Description:
+    {description}
+    """
+
+
+@metrics.timed("prompt_assembly", prompt="skills")
+def build_skills_prompt_in_context():
+    """build_skills_prompt for a call whose profile context is already cached upstream."""
+    return """
+    Based on the job description for the target position, suggest a list of 10-15 highly relevant
+    technical and soft skills. Provide them as a comma-separated list.
+    """
+
+
+@metrics.timed("prompt_assembly", prompt="resume")
+def build_resume_prompt(var_for_ai):
+    """Prompt that generates the full tailored resume as Markdown from the profile context."""
+    return f"""
+    Acting as a seasoned and master resume creator with expert-level knowledge of modern hiring trends and resume formatting,
+    generate a tailored, ATS-compliant, job-specific resume from the candidate profile and job description.
+
+    **Crucially, output the entire resume content using professional Markdown syntax.**
+    Do not include any conversational text, explanations, or Markdown code block fences (```markdown).
+    Just provide the Markdown content of the resume.
+
+    Use appropriate Markdown:
+    - **Name:** Start with `# {var_for_ai['name']}`.
+    - **Contact Info Line (IMPORTANT):** Immediately after the name, output this specific HTML structure for contact info:
+        `<div class="contact-info-line">{var_for_ai['mail']} | <a href="{var_for_ai['linkedin']}">LinkedIn</a>| <a href="{var_for_ai['portfolio_link_website']}">Portfolio</a> | {var_for_ai['location']}</div>`
+        Ensure all user data is directly injected into this HTML string, and the `<a>` tags are correct.
+    - **Major Sections:** Use `##` for sections like "Summary", "Skills", "Experience", "Education", "Certifications", "Professional Affiliations".
+    - **Sub-headings:** Use `###` for job titles/degrees.
+    - **Bullet points:** Use `-` for responsibilities, projects, and list items.
+    - **Bold text:** Use `**text**` for emphasis (e.g., skill categories, company names in bold where appropriate).
+    - **Consistent formatting for dates:** (e.g., "Jan 2020 – Present", "May 2022").
+
+    **MANDATORY QUANTIFIERS IN EXPERIENCE SECTION**:
+    For each responsibility or achievement in the Experience section, **invent plausible but realistic numbers, percentages, or metrics if none are explicitly provided by the user.** These should demonstrate impact and results.
+    Example for a responsibility: `- Developed and maintained scalable web applications using Python and Django, leading to a **15% improvement in application performance** and **processing over 10,000 transactions daily**.`
+
+    **BEGIN RESUME MARKDOWN OUTPUT**
+    """
+
+
+@metrics.timed("prompt_assembly", prompt="refine")
+def build_refine_prompt(resume_content, refinement_request):
+    """Prompt that applies a free-form refinement request to the whole resume."""
+    return f"""
+    Please refine the following resume content based on the user's request, staying true to the candidate profile.
+    Maintain a professional, **Markdown** format.
+    Do not include any conversational text or Markdown code block fences (```markdown).
+
+    Original Resume Content:
+    {resume_content}
+
+    Refinement Request:
+    {refinement_request}
+
+    Provide the refined resume content in Markdown, ensuring continued use of quantifiable results where appropriate.
+    """
+
+
+@metrics.timed("prompt_assembly", prompt="cover_letter")
+def build_cover_letter_prompt():
+    """Prompt that drafts a cover letter for the target job in the profile context."""
+    return """
+    Draft a professional, compelling cover letter for this job application.
+    Tailor it to the job description and highlight how the candidate's experience and skills are a perfect match.
+
+    Structure the letter with:
+    1.  Your Contact Information
+    2.  Date
+    3.  Hiring Manager/Company Address (use placeholders if not provided, e.g., "Hiring Manager" "Company Name")
+    4.  Salutation
+    5.  Opening Paragraph: State the position you're applying for and where you saw it, expressing enthusiasm.
+    6.  Body Paragraphs (2-3): Connect your key skills and experiences (especially from job description) to the job requirements. Use specific examples.
+    7.  Closing Paragraph: Reiterate interest, mention enclosed resume, and express eagerness for an interview.
+    8.  Professional Closing and Your Name.
+    """
@@ -0,0 +1,240 @@
+"""
+Request coalescing and quota limiting for upstream AI calls.
+
+`SingleFlight` lets identical concurrent requests share one upstream call: the
+first caller for a key does the work and everyone who arrives while it is in
+flight waits for, and receives, the same result.
+
+`TokenBucketLimiter` keeps the process under the API's requests-per-minute and
+tokens-per-minute quotas, which Gemini sets per model, so each model has its
+own buckets. Callers that would exceed a quota wait for the bucket to refill
+instead of being sent upstream to collect a 429.
+`SqliteTokenBucketLimiter` keeps the buckets in a SQLite file, so several
+server processes on one host share one quota.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call waited longer than the limiter's max wait for quota."""
+
+
+class FlightAbandoned(Exception):
+    """Set on a flight whose leader stopped before producing a result (e.g. a cancelled stream)."""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        """Blocks until the leader finishes; returns its result or raises its error."""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {} # key -> _Flight
+
+    def join(self, key):
+        """
+        Returns (flight, is_leader). The leader must call finish(); followers
+        call flight.wait().
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        """Publishes the leader's outcome to every follower and retires the key."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight.done.set()
+
+    def do(self, key, fn):
+        """Runs fn() once for all concurrent callers with the same key."""
+        flight, is_leader = self.join(key)
+        if not is_leader:
+            return flight.wait()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result=result)
+        return result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets for requests and tokens per minute, one pair per
+    model. `model_quotas` maps a model to its (requests, tokens) per minute;
+    other models get the default quotas. A quota of 0 disables that bucket.
+    Buckets start full, so a burst up to the per-minute quota goes straight through.
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_wait_seconds=None, model_quotas=None):
+        self.default_quotas = (requests_per_minute, tokens_per_minute)
+        self.model_quotas = dict(model_quotas or {})
+        self.max_wait_seconds = max_wait_seconds
+        self.capacities = {} # bucket name -> capacity, for every model seen so far
+        self._lock = threading.Lock()
+        self._levels = {}
+
+    def _buckets(self, model):
+        """Returns {"requests"/"tokens": bucket name} for `model`, registering its buckets on first use."""
+        quotas = self.model_quotas.get(model, self.default_quotas)
+        buckets = {}
+        for kind, capacity in zip(("requests", "tokens"), quotas):
+            if capacity and capacity > 0:
+                name = f"{model}:{kind}" if model else kind
+                self.capacities.setdefault(name, float(capacity))
+                buckets[kind] = name
+        return buckets
+
+    def _update(self, fn):
+        """Runs fn(levels) atomically; levels maps bucket name -> (level, updated_at)."""
+        with self._lock:
+            return fn(self._levels)
+
+    def _refill(self, levels, now, names):
+        for name in names:
+            capacity = self.capacities[name]
+            level, updated_at = levels.get(name, (capacity, now))
+            levels[name] = (min(capacity, level + (now - updated_at) * capacity / 60.0), now)
+
+    def _try_take(self, levels, cost):
+        """Deducts `cost` ({bucket name: amount}) if every bucket covers it; otherwise returns the seconds until it would."""
+        now = time.time()
+        self._refill(levels, now, cost)
+        wait = 0.0
+        for name, amount in cost.items():
+            level = levels[name][0]
+            if level < amount:
+                wait = max(wait, (amount - level) * 60.0 / self.capacities[name])
+        if wait > 0:
+            return wait
+        for name, amount in cost.items():
+            levels[name] = (levels[name][0] - amount, now)
+        return 0.0
+
+    def acquire(self, tokens=0, model=None):
+        """
+        Blocks until one request and `tokens` tokens of `model`'s quota are
+        available, then takes them. Returns the seconds spent waiting. Raises
+        RateLimitTimeout when the wait would exceed max_wait_seconds.
+        """
+        buckets = self._buckets(model)
+        if not buckets:
+            return 0.0
+        cost = {}
+        if "requests" in buckets:
+            cost[buckets["requests"]] = 1
+        if "tokens" in buckets:
+            # A single request larger than the whole bucket could never fit; let it take the full bucket
+            cost[buckets["tokens"]] = min(tokens, self.capacities[buckets["tokens"]])
+        started = time.monotonic()
+        while True:
+            wait = self._update(lambda levels: self._try_take(levels, cost))
+            waited = time.monotonic() - started
+            if wait <= 0:
+                return waited
+            if self.max_wait_seconds is not None and waited + wait > self.max_wait_seconds:
+                raise RateLimitTimeout(f"AI quota exhausted; the next slot is more than {self.max_wait_seconds:.0f}s away.")
+            # Re-check periodically so a refund or a slower competitor can let us in early
+            time.sleep(min(wait, 1.0))
+
+    def refund(self, tokens=0, requests=0, model=None):
+        """
+        Returns reserved quota to `model`'s buckets: tokens the answer did not
+        use, or a whole request (and its tokens) that never reached the API.
+        """
+        buckets = self._buckets(model)
+        amounts = {
+            buckets[kind]: amount for kind, amount in (("requests", requests), ("tokens", tokens))
+            if amount > 0 and kind in buckets
+        }
+        if not amounts:
+            return
+
+        def give_back(levels):
+            self._refill(levels, time.time(), amounts)
+            for name, amount in amounts.items():
+                level, updated_at = levels[name]
+                levels[name] = (min(self.capacities[name], level + amount), updated_at)
+
+        self._update(give_back)
+
+
+class SqliteTokenBucketLimiter(TokenBucketLimiter):
+    """TokenBucketLimiter whose buckets live in a SQLite file shared by every process on the host."""
+
+    def __init__(self, path, requests_per_minute=0, tokens_per_minute=0, max_wait_seconds=None, model_quotas=None):
+        super().__init__(requests_per_minute, tokens_per_minute, max_wait_seconds, model_quotas)
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _connect(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, fn):
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                levels = {name: (level, updated_at) for name, level, updated_at in conn.execute("SELECT name, level, updated_at FROM buckets")}
+                result = fn(levels)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                    [(name, level, updated_at) for name, (level, updated_at) in levels.items() if name in self.capacities],
+                )
+                conn.execute("COMMIT")
+                return result
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Fall back to this process's own buckets rather than failing the AI call
+            print(f"Shared rate limiter unavailable, limiting per process: {e}")
+            return super()._update(fn)
+
+
+def build_rate_limiter(requests_per_minute, tokens_per_minute, shared_path=None, max_wait_seconds=None, model_quotas=None):
+    """
+    Returns a shared (SQLite) limiter when `shared_path` is set, else an in-process
+    one. The per-minute quotas apply to every model not listed in `model_quotas`.
+    """
+    if shared_path:
+        return SqliteTokenBucketLimiter(shared_path, requests_per_minute, tokens_per_minute, max_wait_seconds, model_quotas)
+    return TokenBucketLimiter(requests_per_minute, tokens_per_minute, max_wait_seconds, model_quotas)
@@ -0,0 +1,131 @@
+"""
+Disk-backed cache for AI responses.
+
+Entries are content-addressed (SHA-256 of the model URL plus the full request
+payload) and stored in SQLite, so they survive Streamlit restarts and are shared
+between sessions and worker processes. The cache is bounded by total size with
+least-recently-used eviction, and every entry expires after a fixed TTL.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_cache_key(api_url, payload, scope=""):
+    """
+    Builds a stable cache key from the model URL and the request payload.
+    `scope` keeps callers apart that must not share answers (e.g. different API keys).
+    """
+    canonical = json.dumps(
+        {"url": api_url, "payload": payload, "scope": scope},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache with TTL, persisted in a SQLite file."""
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def _connect(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return value
+        except sqlite3.Error as e:
+            print(f"Response cache read failed: {e}")
+            return None
+
+    def set(self, key, value):
+        """Stores `value` under `key` and evicts old entries if the cache is over budget."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"Response cache write failed: {e}")
+
+    def _evict(self, conn, now):
+        """Drops expired entries, then least-recently-used ones until under max_bytes."""
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self):
+        """Removes every cached response."""
+        try:
+            self._connect().execute("DELETE FROM responses")
+        except sqlite3.Error as e:
+            print(f"Response cache clear failed: {e}")
+
+    def stats(self):
+        """Returns the number of entries and total stored bytes."""
+        try:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {"entries": count, "bytes": total}
+        except sqlite3.Error as e:
+            print(f"Response cache stats failed: {e}")
+            return {"entries": 0, "bytes": 0}
@@ -0,0 +1,318 @@
+"""
+Section-level resume generation.
+
+The resume is split into independent units (Summary, Skills, one unit per job,
+Education, Certifications, Professional Affiliations). Each unit is fingerprinted
+against only the inputs it depends on, so after an edit just the affected units
+are sent to the model as one structured JSON request; everything else is reused
+from the section cache and the Markdown is reassembled locally.
+"""
+import hashlib
+import json
+import re
+
+from metrics import metrics
+
+# Bump when the section prompt changes in a way that should invalidate cached sections
+SECTION_PROMPT_VERSION = 1
+
+# (section key, Markdown heading) in resume order
+RESUME_SECTIONS = [
+    ("summary", "Summary"),
+    ("skills", "Skills"),
+    ("experience", "Experience"),
+    ("education", "Education"),
+    ("certifications", "Certifications"),
+    ("affiliations", "Professional Affiliations"),
+]
+
+SECTIONS_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "sections": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "id": {"type": "STRING"},
+                    "markdown": {"type": "STRING"},
+                },
+                "required": ["id", "markdown"],
+            },
+        },
+    },
+    "required": ["sections"],
+}
+
+_UNIT_INSTRUCTIONS = {
+    "summary": "A 2-4 sentence professional summary tailored to the target position, as a single paragraph.",
+    "skills": "The candidate's skills grouped into categories, one `-` bullet per category with the category name in **bold**.",
+    "experience": (
+        "One role: a `###` heading with the job title, then a line with the **organization**, location and dates "
+        "(e.g. \"Jan 2020 – Present\"), then 3-6 `-` bullets. **Invent plausible but realistic numbers, percentages, "
+        "or metrics if none are provided** to demonstrate impact."
+    ),
+    "education": "Every education entry: a `###` heading with the degree and course, then the institution, date and GPA (omit GPA if 0).",
+    "certifications": "Every certification as a `-` bullet with the name in **bold**, the date, and a short description.",
+    "affiliations": "Every professional affiliation as a `-` bullet with the body in **bold** and the join date.",
+}
+
+
+def _fingerprint(kind, inputs):
+    canonical = json.dumps(
+        {"kind": kind, "inputs": inputs, "version": SECTION_PROMPT_VERSION},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _unit(unit_id, kind, inputs):
+    return {"id": unit_id, "section": kind, "inputs": inputs, "fingerprint": _fingerprint(kind, inputs)}
+
+
+def plan_sections(var_for_ai):
+    """
+    Returns the ordered list of section units for the current profile.
+    Each unit records the inputs it depends on and a fingerprint of them.
+    """
+    position = var_for_ai['position']
+    description = var_for_ai['description']
+    units = [
+        _unit("summary", "summary", {
+            'position': position,
+            'description': description,
+            'summary': var_for_ai['summary'],
+            'tech': var_for_ai['tech'],
+            'roles': [f"{job['job']} at {job['organization']}" for job in var_for_ai['work experience']],
+        }),
+        _unit("skills", "skills", {
+            'position': position,
+            'description': description,
+            'tech': var_for_ai['tech'],
+        }),
+    ]
+    for i, job in enumerate(var_for_ai['work experience'], start=1):
+        units.append(_unit(f"experience-{i}", "experience", {
+            'position': position,
+            'description': description,
+            'job': job,
+        }))
+    if var_for_ai['Educational Experience']:
+        units.append(_unit("education", "education", {
+            'position': position,
+            'entries': var_for_ai['Educational Experience'],
+        }))
+    if var_for_ai['Certifications']:
+        units.append(_unit("certifications", "certifications", {
+            'position': position,
+            'entries': var_for_ai['Certifications'],
+        }))
+    if var_for_ai['Professional Affiliations']:
+        units.append(_unit("affiliations", "affiliations", {
+            'entries': var_for_ai['Professional Affiliations'],
+        }))
+    return units
+
+
+def stale_units(units, section_cache):
+    """Returns the units whose fingerprint has no cached Markdown."""
+    return [unit for unit in units if unit['fingerprint'] not in section_cache]
+
+
+@metrics.timed("prompt_assembly", prompt="sections")
+def build_sections_prompt(var_for_ai, units):
+    """Prompt that generates only the given units, returned as JSON keyed by unit id."""
+    requested = []
+    for unit in units:
+        inputs = {k: v for k, v in unit['inputs'].items() if k not in ('position', 'description')}
+        requested.append(
+            f"- id: \"{unit['id']}\"\n"
+            f"      write: {_UNIT_INSTRUCTIONS[unit['section']]}\n"
+            f"      data: {json.dumps(inputs, separators=(',', ':'), default=str)}"
+        )
+    requested_text = "\n    ".join(requested)
+    return f"""
+    You are a seasoned and master resume creator with expert-level knowledge of modern hiring trends and resume formatting.
+    Write the requested sections of a tailored, ATS-compliant resume for the target position below.
+
+    Target Position: {var_for_ai['position']}
+    Job Description: {var_for_ai['description']}
+
+    Requested sections:
+    {requested_text}
+
+    Rules:
+    - Return JSON of the form {{"sections": [{{"id": "<id>", "markdown": "<section markdown>"}}]}} with exactly one item per requested id.
+    - Each "markdown" value is professional Markdown for that section's body only. Do NOT include the `##` section heading, the candidate's name or contact details.
+    - Use `-` for bullet points and `**text**` for emphasis. Do not include conversational text or code fences.
+    """
+
+
+@metrics.timed("response_parse", response="sections")
+def parse_sections_response(text, unit_ids):
+    """
+    Parses the model's JSON answer into {unit id: markdown}.
+    Raises ValueError when the answer is not valid JSON or misses a requested unit.
+    """
+    cleaned = text.strip()
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", cleaned)
+    data = json.loads(cleaned)
+    sections = data.get('sections') if isinstance(data, dict) else data
+    if not isinstance(sections, list):
+        raise ValueError("AI response has no 'sections' list.")
+    generated = {}
+    for item in sections:
+        if isinstance(item, dict) and isinstance(item.get('id'), str) and isinstance(item.get('markdown'), str):
+            generated[item['id']] = item['markdown'].strip()
+    missing = [unit_id for unit_id in unit_ids if not generated.get(unit_id)]
+    if missing:
+        raise ValueError(f"AI response is missing sections: {', '.join(missing)}")
+    return generated
+
+
+def header_markdown(var_for_ai):
+    """Name heading and contact line, built locally so they never need a model call."""
+    return (
+        f"# {var_for_ai['name']}\n"
+        f"<div class=\"contact-info-line\">{var_for_ai['mail']} | <a href=\"{var_for_ai['linkedin']}\">LinkedIn</a>"
+        f"| <a href=\"{var_for_ai['portfolio_link_website']}\">Portfolio</a> | {var_for_ai['location']}</div>"
+    )
+
+
+def assemble_markdown(var_for_ai, units, section_cache):
+    """Reassembles the full resume Markdown from cached section bodies."""
+    parts = [header_markdown(var_for_ai)]
+    for kind, title in RESUME_SECTIONS:
+        bodies = [section_cache[unit['fingerprint']] for unit in units if unit['section'] == kind]
+        if bodies:
+            parts.append(f"## {title}\n\n" + "\n\n".join(bodies))
+    return "\n\n".join(parts) + "\n"
+
+
+# --- Section-level refinement ---
+
+# Words in a refinement request that point at a section, beyond its own heading.
+# Matched as whole words (a trailing "s" allowed); a "*" marks a stem that may
+# be followed by more letters ("responsibilit*" matches "responsibilities").
+_SECTION_KEYWORDS = {
+    "Summary": ("summary", "profile", "objective", "intro*"),
+    "Skills": ("skill", "technolog*", "tool", "stack", "competenc*"),
+    "Experience": ("experience", "work history", "role", "bullet", "achievement", "responsibilit*", "project"),
+    "Education": ("education", "degree", "school", "universit*", "gpa", "course"),
+    "Certifications": ("certification", "certificate", "license"),
+    "Professional Affiliations": ("affiliation", "association", "member", "membership"),
+}
+
+# Wording about the resume as a whole; a request using it gets a full refinement
+# even if it also names a section, so no section is left out of date
+_GENERAL_WORDING = re.compile(
+    r"(?<!\w)(whole|entire|overall|everything|throughout|all sections|resume|cv|job|jd|tailor\w*)(?!\w)"
+)
+
+
+def _keyword_pattern(keyword):
+    if keyword.endswith("*"):
+        return r"(?<!\w)" + re.escape(keyword[:-1]) + r"\w*"
+    return r"(?<!\w)" + re.escape(keyword) + r"s?(?!\w)"
+
+
+def split_markdown_sections(markdown_text):
+    """
+    Splits resume Markdown on `##` headings.
+    Returns (preamble, [(title, body), ...]); the preamble holds the name and contact line.
+    """
+    preamble_lines = []
+    sections = []
+    for line in markdown_text.splitlines():
+        if line.startswith("## "):
+            sections.append([line[3:].strip(), []])
+        elif sections:
+            sections[-1][1].append(line)
+        else:
+            preamble_lines.append(line)
+    return "\n".join(preamble_lines).strip(), [(title, "\n".join(body).strip()) for title, body in sections]
+
+
+def join_markdown_sections(preamble, sections):
+    """Inverse of split_markdown_sections."""
+    parts = [preamble] if preamble else []
+    parts.extend(f"## {title}\n\n{body}" for title, body in sections)
+    return "\n\n".join(parts) + "\n"
+
+
+def section_titles(markdown_text):
+    """Returns the `##` headings of a resume in order."""
+    return [title for title, _ in split_markdown_sections(markdown_text)[1]]
+
+
+def match_sections(refinement_request, markdown_text):
+    """
+    Picks the sections a refinement request is about, by heading name, known
+    keywords, or a `###` sub-heading (e.g. a job title) quoted in the request,
+    all matched as whole words. Returns an empty list (refine everything) when
+    nothing matches or the request is about the resume as a whole.
+    """
+    request = refinement_request.lower()
+    if _GENERAL_WORDING.search(request):
+        return []
+    matched = []
+    for title, body in split_markdown_sections(markdown_text)[1]:
+        patterns = [_keyword_pattern(keyword) for keyword in (title.lower(),) + _SECTION_KEYWORDS.get(title, ())]
+        patterns += [
+            r"(?<!\w)" + re.escape(line[4:].strip().lower()) + r"(?!\w)"
+            for line in body.splitlines() if line.startswith("### ") and line[4:].strip()
+        ]
+        if any(re.search(pattern, request) for pattern in patterns):
+            matched.append(title)
+    return matched
+
+
+@metrics.timed("prompt_assembly", prompt="section_refine")
+def build_section_refine_prompt(markdown_text, titles, refinement_request):
+    """Prompt that refines only the named sections and returns them as JSON."""
+    _, sections = split_markdown_sections(markdown_text)
+    selected = "\n\n".join(f"## {title}\n{body}" for title, body in sections if title in titles)
+    return f"""
+    You are an expert resume writer. Please refine the following resume sections based on the user's request.
+    Maintain a professional, **Markdown** format, ensuring continued use of quantifiable results where appropriate.
+
+    Resume Sections:
+    {selected}
+
+    Refinement Request:
+    {refinement_request}
+
+    Return JSON of the form {{"sections": [{{"id": "<section heading>", "markdown": "<refined section body>"}}]}}
+    with exactly one item per section above, using the heading text (without `##`) as the id.
+    Each "markdown" value is the section body only: no `##` heading, no conversational text, no code fences.
+    """
+
+
+def splice_sections(markdown_text, refined):
+    """Replaces the bodies of the sections in `refined` ({title: body}) and keeps everything else verbatim."""
+    preamble, sections = split_markdown_sections(markdown_text)
+    return join_markdown_sections(preamble, [(title, refined.get(title, body)) for title, body in sections])
+
+
+def sync_section_cache(units, markdown_text, section_cache):
+    """
+    Records the sections of an externally produced resume (a refinement or a full
+    regeneration) under the current unit fingerprints, so the next incremental
+    generation keeps them. Sections whose structure does not line up are skipped.
+    """
+    bodies = dict(split_markdown_sections(markdown_text)[1])
+    for kind, title in RESUME_SECTIONS:
+        kind_units = [unit for unit in units if unit['section'] == kind]
+        body = bodies.get(title)
+        if not kind_units or body is None:
+            continue
+        if kind != "experience":
+            section_cache[kind_units[0]['fingerprint']] = body
+            continue
+        roles = re.split(r"\n(?=### )", body.strip())
+        if len(roles) == len(kind_units) and all(role.startswith("### ") for role in roles):
+            for unit, role in zip(kind_units, roles):
+                section_cache[unit['fingerprint']] = role.strip()
+    return section_cache
@@ -0,0 +1,158 @@
+"""
+Runtime settings for ResumeForge AI.
+
+Every value can be overridden with an environment variable so deployments can
+tune caching and networking without touching the application code.
+"""
+import os
+
+
+def _env_str(name, default):
+    return os.environ.get(name, default)
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+# --- Paths ---
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = _env_str("RESUMEFORGE_CACHE_DIR", os.path.join(APP_DIR, ".resumeforge_cache"))
+
+# --- AI Response Cache ---
+# Responses are keyed on a hash of the full request payload and shared by every
+# session and worker process that points at the same SQLite file.
+RESPONSE_CACHE_ENABLED = _env_bool("RESUMEFORGE_RESPONSE_CACHE", True)
+RESPONSE_CACHE_PATH = _env_str("RESUMEFORGE_RESPONSE_CACHE_PATH", os.path.join(CACHE_DIR, "ai_responses.sqlite3"))
+RESPONSE_CACHE_MAX_MB = _env_float("RESUMEFORGE_RESPONSE_CACHE_MAX_MB", 64.0)
+RESPONSE_CACHE_TTL_SECONDS = _env_int("RESUMEFORGE_RESPONSE_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+# Entries are keyed per API key, so processes sharing the file never serve each other's answers.
+# Calls made above this temperature are expected to vary, so they bypass the cache. The
+# app's creativity slider defaults to 0.7, so only deliberately focused calls are cached
+# and pressing a button again at the default setting always asks for a fresh answer.
+RESPONSE_CACHE_MAX_TEMPERATURE = _env_float("RESUMEFORGE_RESPONSE_CACHE_MAX_TEMPERATURE", 0.2)
+
+# --- Gemini API ---
+GEMINI_API_BASE = _env_str("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_MODEL = _env_str("GEMINI_MODEL", "gemini-2.0-flash")
+# Required: there is no default key, and the app and batch tool refuse to start without one
+GEMINI_API_KEY = _env_str("GEMINI_API_KEY", "")
+# Output caps, sampling, stop sequences, response format and model per kind of call
+# (skills, summary, resume...); GEMINI_MODEL is used wherever a profile names no model
+TASK_PROFILES_PATH = _env_str("RESUMEFORGE_TASK_PROFILES", os.path.join(APP_DIR, "task_profiles.json"))
+
+# --- HTTP Client ---
+HTTP_CONNECT_TIMEOUT_SECONDS = _env_float("RESUMEFORGE_HTTP_CONNECT_TIMEOUT", 5.0)
+HTTP_READ_TIMEOUT_SECONDS = _env_float("RESUMEFORGE_HTTP_READ_TIMEOUT", 90.0)
+HTTP_POOL_SIZE = _env_int("RESUMEFORGE_HTTP_POOL_SIZE", 20)
+HTTP_MAX_RETRIES = _env_int("RESUMEFORGE_HTTP_MAX_RETRIES", 3)
+HTTP_BACKOFF_BASE_SECONDS = _env_float("RESUMEFORGE_HTTP_BACKOFF_BASE", 0.5)
+HTTP_BACKOFF_MAX_SECONDS = _env_float("RESUMEFORGE_HTTP_BACKOFF_MAX", 20.0)
+
+# --- Prompt Budget ---
+# The profile and job description block shared by the resume, cover letter,
+# summary, skill and refine prompts is trimmed (least relevant material first) to
+# stay under this many estimated tokens; 0 sends the full profile.
+PROMPT_TOKEN_BUDGET = _env_int("RESUMEFORGE_PROMPT_TOKEN_BUDGET", 6000)
+
+# --- Context Caching ---
+# "gemini" uploads that shared block once per profile version and model as Gemini
+# cached content and refers to it by name; "local" keeps the bookkeeping in this
+# process but sends the block inline (tests, endpoints without cached content);
+# "off" always sends it inline. Blocks under CONTEXT_CACHE_MIN_TOKENS (the API's
+# minimum for cached content) are always sent inline.
+CONTEXT_CACHE = _env_str("RESUMEFORGE_CONTEXT_CACHE", "gemini")
+CONTEXT_CACHE_TTL_SECONDS = _env_int("RESUMEFORGE_CONTEXT_CACHE_TTL_SECONDS", 900)
+CONTEXT_CACHE_MIN_TOKENS = _env_int("RESUMEFORGE_CONTEXT_CACHE_MIN_TOKENS", 1024)
+
+# --- Speculative Prefetch ---
+# Opt-in (also a toggle in the app): once the position and job description have
+# been unchanged for SPECULATIVE_DEBOUNCE_SECONDS, the summary rewrite and, when
+# the skills list finds none, AI skill suggestions are requested in the
+# background so their buttons answer at once. A session stops prefetching after
+# SPECULATIVE_MAX_WASTED prefetched calls were cancelled or went unused.
+SPECULATIVE_PREFETCH = _env_bool("RESUMEFORGE_SPECULATIVE_PREFETCH", False)
+SPECULATIVE_DEBOUNCE_SECONDS = _env_float("RESUMEFORGE_SPECULATIVE_DEBOUNCE_SECONDS", 2.0)
+SPECULATIVE_MAX_WASTED = _env_int("RESUMEFORGE_SPECULATIVE_MAX_WASTED", 4)
+
+# --- Skill Extraction ---
+# Skills are suggested from the job description locally; the AI is only an optional fallback
+SKILLS_TAXONOMY_PATH = _env_str("RESUMEFORGE_SKILLS_TAXONOMY", os.path.join(APP_DIR, "skills_taxonomy.json"))
+SKILL_SUGGESTIONS_LIMIT = _env_int("RESUMEFORGE_SKILL_SUGGESTIONS_LIMIT", 15)
+
+# --- Gemini Quota ---
+# Calls beyond these per-minute quotas wait for capacity instead of hitting 429s.
+# Each model has its own buckets; these quotas apply to models without an entry in
+# the "models" object of task_profiles.json. The defaults are the free-tier limits
+# for gemini-2.0-flash; 0 disables a limit.
+GEMINI_REQUESTS_PER_MINUTE = _env_float("RESUMEFORGE_GEMINI_RPM", 15)
+GEMINI_TOKENS_PER_MINUTE = _env_float("RESUMEFORGE_GEMINI_TPM", 1_000_000)
+# Share the quota between all processes on this host through a SQLite file
+RATE_LIMIT_SHARED = _env_bool("RESUMEFORGE_RATE_LIMIT_SHARED", False)
+RATE_LIMIT_PATH = _env_str("RESUMEFORGE_RATE_LIMIT_PATH", os.path.join(CACHE_DIR, "rate_limit.sqlite3"))
+# A call that would have to queue longer than this fails instead
+RATE_LIMIT_MAX_WAIT_SECONDS = _env_float("RESUMEFORGE_RATE_LIMIT_MAX_WAIT", 120.0)
+
+# --- Concurrent Generation ---
+# Shared by every session in the process, so it also caps concurrent upstream calls.
+GENERATION_MAX_WORKERS = _env_int("RESUMEFORGE_GENERATION_MAX_WORKERS", 8)
+
+# --- PDF Render Cache ---
+RENDER_CACHE_MAX_MB = _env_float("RESUMEFORGE_RENDER_CACHE_MAX_MB", 64.0)
+# Optionally keep rendered PDFs on disk as well, so they survive restarts
+RENDER_CACHE_SPILL_TO_DISK = _env_bool("RESUMEFORGE_RENDER_CACHE_SPILL", False)
+RENDER_CACHE_SPILL_DIR = _env_str("RESUMEFORGE_RENDER_CACHE_SPILL_DIR", os.path.join(CACHE_DIR, "rendered_pdfs"))
+RENDER_CACHE_SPILL_MAX_MB = _env_float("RESUMEFORGE_RENDER_CACHE_SPILL_MAX_MB", 256.0)
+
+# --- Resume Templates ---
+TEMPLATES_DIR = _env_str("RESUMEFORGE_TEMPLATES_DIR", os.path.join(APP_DIR, "templates"))
+TEMPLATE_BYTECODE_CACHE_DIR = _env_str("RESUMEFORGE_TEMPLATE_BYTECODE_CACHE_DIR", os.path.join(CACHE_DIR, "jinja_bytecode"))
+# Listed first in the layout picker; the rest follow alphabetically
+DEFAULT_RESUME_TEMPLATE = _env_str("RESUMEFORGE_DEFAULT_TEMPLATE", "Modern Professional")
+
+# --- PDF Render Pool ---
+# PDFs are rendered in separate processes so pisa never blocks a Streamlit script thread
+PDF_RENDER_WORKERS = _env_int("RESUMEFORGE_PDF_RENDER_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1)))
+PDF_RENDER_TIMEOUT_SECONDS = _env_float("RESUMEFORGE_PDF_RENDER_TIMEOUT", 60.0)
+
+# --- Metrics ---
+# Per-stage timings, token usage and cache counters; every exporter is off when unset.
+# Structured JSON log of every span and usage event ("-" for stderr)
+METRICS_LOG_PATH = _env_str("RESUMEFORGE_METRICS_LOG", "")
+# Prometheus text file, rewritten every METRICS_FLUSH_SECONDS (node_exporter textfile collector)
+METRICS_PROMETHEUS_FILE = _env_str("RESUMEFORGE_METRICS_FILE", "")
+METRICS_FLUSH_SECONDS = _env_float("RESUMEFORGE_METRICS_FLUSH_SECONDS", 15.0)
+# Serve Prometheus metrics at http://<host>:<port>/metrics
+METRICS_HTTP_PORT = _env_int("RESUMEFORGE_METRICS_PORT", 0)
+
+# --- Profile Store ---
+# Profiles are saved server-side in SQLite and reopened from the ?profile=<id> link.
+# Each profile belongs to the browser that created it (an owner token kept in a
+# cookie). Off by default: turn it on only where that browser-level privacy is enough.
+PROFILE_STORE_ENABLED = _env_bool("RESUMEFORGE_PROFILE_STORE", False)
+PROFILE_STORE_PATH = _env_str("RESUMEFORGE_PROFILE_STORE_PATH", os.path.join(CACHE_DIR, "profiles.sqlite3"))
+# Edits are written this long after the last change, and only the fields that changed
+PROFILE_AUTOSAVE_SECONDS = _env_float("RESUMEFORGE_PROFILE_AUTOSAVE_SECONDS", 2.0)
+
+# --- Shared Session State ---
+# Generated documents, the resume section cache and the PDF job of each session,
+# keyed by its profile (or session) link, so any worker process can serve it.
+# "memory" keeps them in this process; use "sqlite" to share them between the
+# processes on one host, or "redis" (needs the redis package) across hosts.
+STATE_BACKEND = _env_str("RESUMEFORGE_STATE_BACKEND", "memory")
+STATE_BACKEND_PATH = _env_str("RESUMEFORGE_STATE_BACKEND_PATH", os.path.join(CACHE_DIR, "session_state.sqlite3"))
+STATE_BACKEND_URL = _env_str("RESUMEFORGE_STATE_BACKEND_URL", "redis://localhost:6379/0")
+STATE_TTL_SECONDS = _env_int("RESUMEFORGE_STATE_TTL_SECONDS", 7 * 24 * 3600)
@@ -0,0 +1,156 @@
+"""
+Local skill extraction and ATS keyword coverage.
+
+Skills are found in free text with an Aho-Corasick automaton built over every
+name and alias in the bundled taxonomy (skills_taxonomy.json), so one pass over
+a job description finds all of them in a few milliseconds with no AI call.
+Aliases are normalised to the canonical skill name ("JS", "ECMAScript" ->
+"JavaScript"). Matches must cover whole words, and overlapping matches resolve
+to the longest one ("React Native" rather than "React").
+
+`coverage_score` measures how many of a job description's skills a resume
+mentions, weighting each skill by how often the posting repeats it.
+"""
+import json
+import math
+from collections import deque
+
+
+def _lower_preserving_offsets(text):
+    """Lower-cases text without changing its length, so match offsets index the original."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word_char(c):
+    return c.isalnum() or c == "_"
+
+
+class SkillExtractor:
+    """Multi-pattern matcher mapping skill names and aliases to canonical skills."""
+
+    def __init__(self, taxonomy):
+        self.categories = {} # canonical name -> category
+        self._patterns = [] # pattern id -> (lower-cased alias, exact alias or None, canonical name)
+        case_sensitive = set(taxonomy.get("case_sensitive", ()))
+        for category, entries in taxonomy["categories"].items():
+            for entry in entries:
+                names = [entry] if isinstance(entry, str) else list(entry)
+                canonical = names[0]
+                self.categories[canonical] = category
+                for alias in names:
+                    self._patterns.append((alias.lower(), alias if alias in case_sensitive else None, canonical))
+        self._build()
+
+    def _build(self):
+        """Builds the goto/fail/output tables of the Aho-Corasick automaton."""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern_id, (alias, _, _) in enumerate(self._patterns):
+            state = 0
+            for c in alias:
+                next_state = self._goto[state].get(c)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][c] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and c not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(c, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text):
+        """Returns non-overlapping (start, end, canonical name) matches in text order."""
+        lowered = _lower_preserving_offsets(text)
+        candidates = []
+        state = 0
+        for i, c in enumerate(lowered):
+            while state and c not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(c, 0)
+            for pattern_id in self._out[state]:
+                alias, exact, canonical = self._patterns[pattern_id]
+                start, end = i + 1 - len(alias), i + 1
+                # Whole words only: "Java" must not match inside "JavaScript"
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(alias[0]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(alias[-1]):
+                    continue
+                if exact is not None and text[start:end] != exact:
+                    continue
+                candidates.append((start, end, canonical))
+
+        matches = []
+        last_end = 0
+        for start, end, canonical in sorted(candidates, key=lambda m: (m[0], -(m[1] - m[0]))):
+            if start >= last_end:
+                matches.append((start, end, canonical))
+                last_end = end
+        return matches
+
+    def counts(self, text):
+        """Returns {canonical skill: number of mentions} in order of first mention."""
+        found = {}
+        for _, _, canonical in self.find(text):
+            found[canonical] = found.get(canonical, 0) + 1
+        return found
+
+    def extract(self, text, limit=None):
+        """Canonical skills mentioned in text, most frequently mentioned first."""
+        found = self.counts(text)
+        order = {name: i for i, name in enumerate(found)}
+        ranked = sorted(found, key=lambda name: (-found[name], order[name]))
+        return ranked[:limit] if limit else ranked
+
+    def normalize(self, skills):
+        """Maps user-entered skill names to canonical names where the taxonomy knows them."""
+        normalized = []
+        for skill in skills:
+            matches = self.find(skill)
+            canonical = matches[0][2] if len(matches) == 1 and matches[0][1] - matches[0][0] == len(skill.strip()) else skill.strip()
+            if canonical and canonical not in normalized:
+                normalized.append(canonical)
+        return normalized
+
+
+def load_taxonomy(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def coverage_score(extractor, job_description, resume_text):
+    """
+    Share of the job description's skills that the resume mentions, weighted by
+    how often the posting repeats each skill (1 + log of its mention count).
+    Returns {'score': 0-100 or None, 'matched': [...], 'missing': [...]}, with
+    missing skills ordered most important first.
+    """
+    import numpy as np
+
+    wanted = extractor.counts(job_description)
+    if not wanted:
+        return {'score': None, 'matched': [], 'missing': []}
+    names = list(wanted)
+    present = set(extractor.counts(resume_text))
+    weights = 1 + np.log(np.fromiter((wanted[name] for name in names), dtype=float, count=len(names)))
+    covered = np.fromiter((name in present for name in names), dtype=bool, count=len(names))
+    order = np.argsort(-weights, kind="stable")
+    return {
+        'score': int(math.floor(100 * weights[covered].sum() / weights.sum() + 0.5)),
+        'matched': [names[i] for i in order if covered[i]],
+        'missing': [names[i] for i in order if not covered[i]],
+    }
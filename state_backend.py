@@ -0,0 +1,190 @@
+"""
+Session state shared between app processes.
+
+A session's generated documents (resume, cover letter, skill suggestions), its
+resume section cache and its PDF job live in one process's `st.session_state`,
+so a user had to stay on the worker that produced them. The backends here hold
+those values outside the process, keyed by a token the page link carries (the
+profile id, or a session id when there is no profile), so any worker can pick a
+session up after a reconnect, a rebalance or a restart.
+
+  * `MemoryStateBackend` - this process only; the default for a single worker.
+  * `SqliteStateBackend` - a SQLite file shared by every process on the host.
+  * `RedisStateBackend`  - any Redis-protocol server (Redis, Valkey, KeyDB...),
+    shared across hosts; needs the optional `redis` package.
+
+Values are stored JSON-encoded, so every backend hands back copies rather than
+the objects it was given, and an entry expires `ttl_seconds` after its last save.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+class MemoryStateBackend:
+    """State kept in this process, for a single worker process."""
+
+    def __init__(self, ttl_seconds=7 * 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {} # token -> (expires_at, {key: encoded value})
+        self._lock = threading.Lock()
+
+    def load(self, token):
+        """Returns {key: value} stored for the token ({} when there is none)."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(token, None)
+                return {}
+            return {key: json.loads(value) for key, value in entry[1].items()}
+
+    def save(self, token, values):
+        """Stores the given keys for the token, leaving its other keys as they are."""
+        now = time.time()
+        encoded = {key: _encode(value) for key, value in values.items()}
+        with self._lock:
+            entry = self._entries.get(token)
+            stored = entry[1] if entry is not None and entry[0] > now else {}
+            stored.update(encoded)
+            self._entries[token] = (now + self.ttl_seconds, stored)
+            for expired in [t for t, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                del self._entries[expired]
+
+    def delete(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+
+class SqliteStateBackend:
+    """State kept in a SQLite file shared by every process on the host."""
+
+    def __init__(self, path, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS session_state (
+                token TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (token, key)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS session_state_expires_at ON session_state (expires_at)")
+
+    def _connect(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, token):
+        """Returns {key: value} stored for the token ({} when there is none or it cannot be read)."""
+        try:
+            rows = self._connect().execute(
+                "SELECT key, value FROM session_state WHERE token = ? AND expires_at > ?", (token, time.time())
+            ).fetchall()
+            return {key: json.loads(value) for key, value in rows}
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Shared state read failed: {e}")
+            return {}
+
+    def save(self, token, values):
+        """Stores the given keys for the token and extends the expiry of all its keys."""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO session_state (token, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    [(token, key, _encode(value), expires_at) for key, value in values.items()],
+                )
+                conn.execute("UPDATE session_state SET expires_at = ? WHERE token = ?", (expires_at, token))
+                conn.execute("DELETE FROM session_state WHERE expires_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            print(f"Shared state write failed: {e}")
+
+    def delete(self, token):
+        try:
+            self._connect().execute("DELETE FROM session_state WHERE token = ?", (token,))
+        except sqlite3.Error as e:
+            print(f"Shared state write failed: {e}")
+
+
+class RedisStateBackend:
+    """State kept in a Redis-protocol server, one hash per token, shared across hosts."""
+
+    def __init__(self, url, ttl_seconds=7 * 24 * 3600, prefix="resumeforge:state:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis state backend needs the 'redis' package (pip install redis).") from e
+        self._errors = (redis.RedisError,)
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def load(self, token):
+        """Returns {key: value} stored for the token ({} when there is none or it cannot be read)."""
+        try:
+            stored = self.client.hgetall(self.prefix + token)
+            return {key.decode("utf-8"): json.loads(value) for key, value in stored.items()}
+        except self._errors + (ValueError,) as e:
+            print(f"Shared state read failed: {e}")
+            return {}
+
+    def save(self, token, values):
+        """Stores the given keys for the token and extends the expiry of all its keys."""
+        if not values:
+            return
+        name = self.prefix + token
+        try:
+            pipeline = self.client.pipeline()
+            pipeline.hset(name, mapping={key: _encode(value) for key, value in values.items()})
+            pipeline.expire(name, int(self.ttl_seconds))
+            pipeline.execute()
+        except self._errors as e:
+            print(f"Shared state write failed: {e}")
+
+    def delete(self, token):
+        try:
+            self.client.delete(self.prefix + token)
+        except self._errors as e:
+            print(f"Shared state write failed: {e}")
+
+
+STATE_BACKENDS = ("memory", "sqlite", "redis")
+
+
+def build_state_backend(kind, path=None, url=None, ttl_seconds=7 * 24 * 3600):
+    """Returns the backend named by `kind` ("memory", "sqlite" or "redis")."""
+    kind = (kind or "memory").strip().lower()
+    if kind == "memory":
+        return MemoryStateBackend(ttl_seconds)
+    if kind == "sqlite":
+        return SqliteStateBackend(path, ttl_seconds)
+    if kind == "redis":
+        return RedisStateBackend(url, ttl_seconds)
+    raise ValueError(f"Unknown state backend {kind!r}; expected one of {', '.join(STATE_BACKENDS)}")
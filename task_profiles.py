@@ -0,0 +1,148 @@
+"""
+Generation settings per kind of AI call.
+
+A skill list, a three-sentence summary and a full resume need very different
+output allowances, so each task has a `TaskProfile`: its output-token cap,
+sampling, stop sequences, response format and model. Short, frequent calls get
+tight caps (which also shrink what the rate limiter reserves up front) and can
+go to a lighter model.
+
+Profiles are read from a JSON file (task_profiles.json next to the app by
+default) whose "tasks" object maps a task name to the settings that differ from
+the TaskProfile defaults. Response schemas are named there ("sections",
+"bullets") and resolved here, since they are defined in code next to their
+parsers. The file's optional "models" object holds the per-minute quotas of
+models whose quotas differ from the GEMINI_RPM/TPM settings.
+"""
+import json
+from dataclasses import dataclass
+
+from prompts import BULK_BULLETS_RESPONSE_SCHEMA
+from resume_sections import SECTIONS_RESPONSE_SCHEMA
+
+TASKS = ("skills", "summary", "bullets", "bullets_bulk", "resume", "resume_sections", "cover_letter", "refine", "refine_sections")
+RESPONSE_SCHEMAS = {"sections": SECTIONS_RESPONSE_SCHEMA, "bullets": BULK_BULLETS_RESPONSE_SCHEMA}
+
+
+@dataclass(frozen=True, slots=True)
+class TaskProfile:
+    name: str = "default"
+    model: str = None # None: the client's default model
+    max_output_tokens: int = 2048
+    top_p: float = 0.95
+    top_k: int = 60
+    stop_sequences: tuple = ()
+    response_mime_type: str = "text/plain"
+    response_schema: dict = None
+    max_continuations: int = 0 # Follow-up calls made when the answer stops at max_output_tokens
+
+    def generation_config(self, temperature, response_mime_type=None, response_schema=None):
+        """The generationConfig of a request; explicit mime type/schema override the profile's."""
+        config = {
+            "temperature": temperature,
+            "topP": self.top_p,
+            "topK": self.top_k,
+            "maxOutputTokens": self.max_output_tokens,
+            "responseMimeType": response_mime_type or self.response_mime_type,
+        }
+        if self.stop_sequences:
+            config["stopSequences"] = list(self.stop_sequences)
+        schema = response_schema if response_schema is not None else self.response_schema
+        if schema is not None:
+            config["responseSchema"] = schema
+        return config
+
+
+# The settings every call used before profiles existed
+DEFAULT_PROFILE = TaskProfile()
+
+_FIELD_TYPES = {
+    "model": (str, type(None)),
+    "max_output_tokens": int,
+    "top_p": (int, float),
+    "top_k": int,
+    "stop_sequences": list,
+    "response_mime_type": str,
+    "response_schema": (str, type(None)),
+    "max_continuations": int,
+}
+_MINIMUMS = {"max_output_tokens": 1, "top_k": 1, "max_continuations": 0}
+
+
+def _read_profile(name, settings):
+    errors = []
+    if not isinstance(settings, dict):
+        return None, [f"{name}: expected an object"]
+    values = {}
+    for key, value in settings.items():
+        expected = _FIELD_TYPES.get(key)
+        if expected is None:
+            errors.append(f"{name}.{key}: unknown setting (known: {', '.join(_FIELD_TYPES)})")
+        elif not isinstance(value, expected) or isinstance(value, bool):
+            errors.append(f"{name}.{key}: unexpected value {value!r}")
+        elif key == "response_schema" and value is not None and value not in RESPONSE_SCHEMAS:
+            errors.append(f"{name}.{key}: unknown schema {value!r} (known: {', '.join(RESPONSE_SCHEMAS)})")
+        elif key == "stop_sequences":
+            if not all(isinstance(item, str) for item in value) or len(value) > 5:
+                errors.append(f"{name}.{key}: expected up to 5 strings")
+            values[key] = tuple(value)
+        elif key == "response_schema":
+            values[key] = RESPONSE_SCHEMAS.get(value)
+        elif key in _MINIMUMS and value < _MINIMUMS[key]:
+            errors.append(f"{name}.{key}: must be at least {_MINIMUMS[key]}")
+        else:
+            values[key] = value
+    return TaskProfile(name=name, **values), errors
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_task_profiles(path):
+    """
+    Returns {task name: TaskProfile} for every task in TASKS, plus any extra tasks
+    the file defines. Tasks the file leaves out use the default settings. Raises
+    ValueError listing every problem if the file is invalid.
+    """
+    data = _read_json(path)
+    tasks = data.get("tasks") if isinstance(data, dict) else None
+    if not isinstance(tasks, dict):
+        raise ValueError(f"{path}: expected an object with a 'tasks' object")
+    profiles = {name: TaskProfile(name=name) for name in TASKS}
+    errors = []
+    for name, settings in tasks.items():
+        profile, profile_errors = _read_profile(name, settings)
+        errors += profile_errors
+        if profile is not None:
+            profiles[name] = profile
+    if errors:
+        raise ValueError(f"Invalid task profiles in {path}: " + "; ".join(errors))
+    return profiles
+
+
+def load_model_quotas(path):
+    """
+    Returns {model: (requests per minute, tokens per minute)} from the file's
+    "models" object; models it leaves out use the default quotas. Raises
+    ValueError listing every problem if the object is invalid.
+    """
+    data = _read_json(path)
+    models = data.get("models", {}) if isinstance(data, dict) else None
+    if not isinstance(models, dict):
+        raise ValueError(f"{path}: 'models' must be an object")
+    quotas = {}
+    errors = []
+    for model, limits in models.items():
+        if not isinstance(limits, dict) or set(limits) - {"requests_per_minute", "tokens_per_minute"}:
+            errors.append(f"{model}: expected an object with requests_per_minute and/or tokens_per_minute")
+            continue
+        values = [limits.get("requests_per_minute", 0), limits.get("tokens_per_minute", 0)]
+        if any(not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0 for value in values):
+            errors.append(f"{model}: quotas must be numbers of at least 0 (0 disables a limit)")
+            continue
+        quotas[model] = tuple(values)
+    if errors:
+        raise ValueError(f"Invalid model quotas in {path}: " + "; ".join(errors))
+    return quotas
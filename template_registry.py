@@ -0,0 +1,91 @@
+"""
+Registry of resume PDF layouts loaded from the templates directory.
+
+Templates are compiled once per process through a Jinja `Environment` with a
+bytecode cache, so Streamlit reruns never re-parse them. The environment checks
+each file's modification time on lookup and recompiles it when it changed, and
+the directory listing is rescanned whenever the directory itself changes, so new
+or edited layouts show up without restarting the app.
+"""
+import os
+import threading
+
+TEMPLATE_EXTENSION = ".html"
+
+
+def display_name(filename):
+    """Turns `classic_clean.html` into "Classic Clean"."""
+    stem = filename[:-len(TEMPLATE_EXTENSION)]
+    return " ".join(word.capitalize() for word in stem.replace("-", "_").split("_") if word)
+
+
+class TemplateRegistry:
+    """Maps layout display names to compiled Jinja templates in a directory."""
+
+    def __init__(self, directory, bytecode_cache_dir=None, default_name=None):
+        self.directory = directory
+        self.default_name = default_name
+        self.bytecode_cache_dir = bytecode_cache_dir
+        self._env = None
+        self._lock = threading.Lock()
+        self._dir_mtime = None
+        self._files = {} # display name -> filename
+
+    @property
+    def env(self):
+        """The Jinja environment, created on the first template lookup."""
+        if self._env is None:
+            with self._lock:
+                if self._env is None:
+                    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+                    bytecode_cache = None
+                    if self.bytecode_cache_dir:
+                        os.makedirs(self.bytecode_cache_dir, exist_ok=True)
+                        bytecode_cache = FileSystemBytecodeCache(self.bytecode_cache_dir)
+                    self._env = Environment(
+                        loader=FileSystemLoader(self.directory),
+                        bytecode_cache=bytecode_cache,
+                        auto_reload=True, # recompile a template when its file's mtime changes
+                        cache_size=-1,
+                    )
+        return self._env
+
+    def _scan(self):
+        """Refreshes the name -> file mapping if the directory changed since the last scan."""
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        if dir_mtime == self._dir_mtime:
+            return self._files
+        with self._lock:
+            files = {}
+            if dir_mtime is not None:
+                for filename in sorted(os.listdir(self.directory)):
+                    if filename.endswith(TEMPLATE_EXTENSION):
+                        files[display_name(filename)] = filename
+            self._files = files
+            self._dir_mtime = dir_mtime
+        return self._files
+
+    def names(self):
+        """Returns the available layout names, the default layout first."""
+        names = list(self._scan())
+        if self.default_name in names:
+            names.remove(self.default_name)
+            names.insert(0, self.default_name)
+        return names
+
+    def get(self, name):
+        """Returns the compiled template for a layout name (recompiled only if the file changed)."""
+        files = self._scan()
+        if name not in files:
+            raise KeyError(f"Unknown resume template: {name}")
+        return self.env.get_template(files[name])
+
+    def template_id(self, name):
+        """Identity of a layout's current version, used to key rendered output."""
+        filename = self._scan()[name]
+        stat = os.stat(os.path.join(self.directory, filename))
+        return f"{filename}:{stat.st_mtime_ns}:{stat.st_size}"
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+from job_queue import JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobCancelled, JobQueue
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def wait_until_finished(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while queue.status(job_id) in (JOB_QUEUED, JOB_RUNNING):
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+    return queue.status(job_id)
+
+
+def test_result_of_a_finished_job(queue):
+    job_id = queue.submit(lambda a, b=0: a + b, 2, b=3)
+    assert wait_until_finished(queue, job_id) == JOB_DONE
+    assert queue.result(job_id) == 5
+
+
+def test_result_is_none_until_the_job_finishes(queue):
+    release = threading.Event()
+    job_id = queue.submit(release.wait, 5)
+    assert queue.result(job_id) is None
+    release.set()
+    wait_until_finished(queue, job_id)
+    assert queue.result(job_id) is True
+
+
+def test_a_failed_job_reraises_its_error(queue):
+    def fail():
+        raise ValueError("upstream failed")
+
+    job_id = queue.submit(fail)
+    assert wait_until_finished(queue, job_id) == JOB_FAILED
+    with pytest.raises(ValueError, match="upstream failed"):
+        queue.result(job_id)
+
+
+def test_unknown_jobs(queue):
+    assert queue.status("missing") is None
+    assert queue.partial("missing") == ""
+    assert not queue.cancel("missing")
+    with pytest.raises(KeyError):
+        queue.result("missing")
+
+
+def test_streamed_jobs_expose_partial_text(queue):
+    next_chunk = threading.Semaphore(0)
+
+    def stream():
+        for chunk in ("Hello", ", ", "world"):
+            next_chunk.acquire()
+            yield chunk
+
+    job_id = queue.submit_stream(stream)
+    next_chunk.release()
+    deadline = time.monotonic() + 5
+    while queue.partial(job_id) != "Hello":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert queue.status(job_id) == JOB_RUNNING
+    next_chunk.release()
+    next_chunk.release()
+    assert wait_until_finished(queue, job_id) == JOB_DONE
+    assert queue.result(job_id) == "Hello, world"
+
+
+def test_a_queued_job_is_cancelled_before_it_runs(queue):
+    release = threading.Event()
+    calls = []
+    blocker = queue.submit(release.wait, 5)
+    job_id = queue.submit(calls.append, "ran")
+    assert queue.cancel(job_id)
+    release.set()
+    wait_until_finished(queue, blocker)
+    assert queue.status(job_id) == JOB_CANCELLED
+    with pytest.raises(JobCancelled):
+        queue.result(job_id)
+    assert calls == []
+
+
+def test_a_cancelled_stream_stops_reading_and_is_closed(queue):
+    next_chunk = threading.Semaphore(0)
+    closed = threading.Event()
+
+    def stream():
+        try:
+            while True:
+                next_chunk.acquire()
+                yield "chunk"
+        finally:
+            closed.set()
+
+    job_id = queue.submit_stream(stream)
+    next_chunk.release()
+    deadline = time.monotonic() + 5
+    while not queue.partial(job_id):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert queue.cancel(job_id)
+    assert not queue.cancel(job_id) # Already finished
+    next_chunk.release()
+    assert closed.wait(5)
+    assert queue.status(job_id) == JOB_CANCELLED
+    assert queue.partial(job_id) == "chunk"
+
+
+def test_finished_jobs_are_forgotten_after_the_retention_period():
+    queue = JobQueue(max_workers=1, job_retention_seconds=0.05)
+    try:
+        job_id = queue.submit(lambda: "done")
+        wait_until_finished(queue, job_id)
+        time.sleep(0.1)
+        queue.submit(lambda: None) # Submitting prunes expired jobs
+        assert queue.status(job_id) is None
+    finally:
+        queue.shutdown()
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+import pdf_export
+from pdf_export import JOB_DONE, JOB_TIMEOUT, PdfRenderError, PdfRenderPool, RenderCache, render_cache_key
+
+
+def _fake_render(source_html):
+    """Stands in for pisa in the worker processes: "sleep:<seconds>" sleeps, anything else renders at once."""
+    if source_html.startswith("sleep:"):
+        time.sleep(float(source_html.split(":")[1]))
+    return source_html.encode("utf-8"), 0.0
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(pdf_export, "_render_pdf_worker", _fake_render)
+    monkeypatch.setattr(pdf_export, "render_resume_html", lambda markdown_text, template, template_id, cache=None: markdown_text)
+    pools = []
+
+    def make(**kwargs):
+        pools.append(PdfRenderPool(**kwargs))
+        return pools[-1]
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+def test_identical_jobs_in_flight_share_one_render(make_pool):
+    pool = make_pool(max_workers=1)
+    first = pool.submit("sleep:0.5", None, "classic")
+    assert pool.submit("sleep:0.5", None, "classic") == first
+    other = pool.submit("sleep:0.5", None, "modern")
+    assert other != first
+    assert pool.wait(first) == b"sleep:0.5"
+    assert pool.wait(other) == b"sleep:0.5"
+    # Once finished, the same content is rendered again rather than joined
+    assert pool.submit("sleep:0.5", None, "classic") != first
+
+
+def test_cached_pdf_completes_without_a_render(make_pool):
+    cache = RenderCache()
+    cache.put(render_cache_key("# Ada", "classic"), "pdf", b"%PDF cached")
+    pool = make_pool(cache=cache)
+    job_id = pool.submit("# Ada", None, "classic")
+    assert pool.status(job_id) == JOB_DONE
+    assert pool.result(job_id) == b"%PDF cached"
+    assert pool._executor is None
+
+
+def test_a_stuck_render_times_out_and_the_pool_recovers(make_pool):
+    pool = make_pool(max_workers=1, timeout_seconds=3.0)
+    stuck = pool.submit("sleep:60", None, "classic")
+    with pytest.raises(PdfRenderError, match="longer than"):
+        pool.wait(stuck)
+    assert pool.status(stuck) == JOB_TIMEOUT
+    # The stuck worker was replaced, so new jobs still render
+    assert pool.wait(pool.submit("# Ada", None, "classic")) == b"# Ada"
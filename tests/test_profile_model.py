@@ -0,0 +1,90 @@
+import dataclasses
+import datetime
+
+import pytest
+
+from profile_model import (
+    SCHEMA_VERSION, Affiliation, Certification, EducationEntry, Profile, ProfileValidationError, WorkEntry,
+    changed_fields, load_profile,
+)
+
+# A profile saved by the app before the schema was versioned
+V1_PROFILE = {
+    'name': "Ada Lovelace",
+    'mail': "ada@example.com",
+    'location': "Hybrid",
+    'position': "Data Engineer",
+    'summary': "Engineer.",
+    'tech': "Python",
+    'work experience': [{
+        'job': "Analyst", 'organization': "Acme", 'location': "Remote",
+        'start_date': "2020-01-15T00:00:00", 'end_date': "Present", 'responsibilities': "Built things.",
+    }],
+    'Educational Experience': [{'school': "MIT", 'degree': "MSc", 'grad_date': "2019-06-01", 'GPA': "3.8"}],
+    'Certifications': [{'title': "AWS", 'date': "2021-03-02"}],
+    'Professional Affiliations': [{'body': "ACM", 'date': ""}],
+}
+
+
+def test_v1_profiles_are_migrated():
+    profile = load_profile(V1_PROFILE)
+    assert profile.name == "Ada Lovelace" and profile.location == "Hybrid"
+    assert profile.work == (WorkEntry(
+        job="Analyst", organization="Acme", location="Remote", start_date=datetime.date(2020, 1, 15),
+        end_date=None, responsibilities="Built things.",
+    ),)
+    assert profile.work[0].is_current
+    assert profile.education == (EducationEntry(school="MIT", degree="MSc", grad_date=datetime.date(2019, 6, 1), gpa=3.8),)
+    assert profile.certifications == (Certification(title="AWS", date=datetime.date(2021, 3, 2)),)
+    assert profile.affiliations == (Affiliation(body="ACM"),)
+
+
+def test_migrated_profiles_save_and_reload_in_the_current_schema():
+    profile = load_profile(V1_PROFILE)
+    saved = profile.to_dict()
+    assert saved['schema_version'] == SCHEMA_VERSION
+    assert 'work experience' not in saved and saved['work_experience'][0]['end_date'] is None
+    assert saved['education'][0]['gpa'] == 3.8
+    assert load_profile(saved) == profile
+
+
+def test_prompt_dict_keeps_the_keys_the_prompts_use():
+    prompt = load_profile(V1_PROFILE).to_prompt_dict(position="Other role")
+    assert prompt['position'] == "Other role"
+    assert prompt['work experience'][0]['end_date'] == "Present"
+    assert prompt['Educational Experience'][0]['GPA'] == 3.8
+
+
+def test_missing_fields_take_their_defaults():
+    assert load_profile({}) == Profile()
+
+
+def test_every_problem_is_reported_at_once():
+    data = {
+        'schema_version': 2,
+        'name': ["not", "text"],
+        'location': "Mars",
+        'work_experience': [{'start_date': "yesterday"}, "not an entry"],
+        'education': [{'gpa': "high"}],
+    }
+    with pytest.raises(ProfileValidationError) as excinfo:
+        load_profile(data)
+    assert excinfo.value.errors == [
+        "name: expected text, got list",
+        "location: must be one of Work from Home, Onsite, Hybrid, got 'Mars'",
+        "work_experience[0].start_date: expected a YYYY-MM-DD date, got 'yesterday'",
+        "work_experience[1]: expected an object",
+        "education[0].gpa: expected a number, got 'high'",
+    ]
+
+
+def test_unknown_schema_versions_are_rejected():
+    with pytest.raises(ProfileValidationError, match="unsupported version"):
+        load_profile({'schema_version': SCHEMA_VERSION + 1})
+
+
+def test_changed_fields_names_only_what_differs():
+    profile = load_profile(V1_PROFILE)
+    edited = dataclasses.replace(profile, summary="New.", work=())
+    assert changed_fields(profile, edited) == ['summary', 'work']
+    assert changed_fields(profile, profile) == []
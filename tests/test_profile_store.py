@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from profile_model import Profile
+from profile_store import AutosaveWorker, ProfileAutosaver, ProfileStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProfileStore(str(tmp_path / "profiles.sqlite3"))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_profiles_round_trip(store):
+    profile_id = store.create("alice", "Data roles", Profile(name="Ada", summary="Engineer."))
+    assert store.load("alice", profile_id) == ("Data roles", Profile(name="Ada", summary="Engineer."))
+    assert store.save_fields(profile_id, {'summary': "Seasoned engineer."})
+    assert store.load("alice", profile_id)[1].summary == "Seasoned engineer."
+
+
+def test_owners_only_see_their_own_profiles(store):
+    profile_id = store.create("alice", "Data roles", Profile(name="Ada"))
+    assert [row[:2] for row in store.list_profiles("alice")] == [(profile_id, "Data roles")]
+    assert store.list_profiles("bob") == []
+    assert store.load("bob", profile_id) is None
+    store.rename("bob", profile_id, "Taken over")
+    store.delete("bob", profile_id)
+    assert store.load("alice", profile_id) == ("Data roles", Profile(name="Ada"))
+    store.rename("alice", profile_id, "Renamed")
+    assert store.load("alice", profile_id)[0] == "Renamed"
+    store.delete("alice", profile_id)
+    assert store.load("alice", profile_id) is None
+
+
+def test_profiles_of_stores_without_owners_are_hidden(tmp_path):
+    path = str(tmp_path / "profiles.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE profiles (id TEXT PRIMARY KEY, name TEXT NOT NULL, schema_version INTEGER NOT NULL,"
+        " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO profiles VALUES ('old', 'Old profile', 2, 0, 0)")
+    conn.commit()
+    conn.close()
+    store = ProfileStore(path)
+    assert store.list_profiles("alice") == []
+    assert store.load("alice", "old") is None
+    assert store.create("alice", "New", Profile()) is not None
+
+
+def test_autosave_writes_once_edits_pause(store):
+    profile_id = store.create("alice", "Data roles", Profile(name="Ada"))
+    writes = []
+    save_fields = store.save_fields
+    store.save_fields = lambda *args, **kwargs: writes.append(args[1]) or save_fields(*args, **kwargs)
+    autosaver = ProfileAutosaver(store, profile_id, Profile(name="Ada"), delay_seconds=0.2, worker=AutosaveWorker())
+    threads = threading.active_count()
+    for summary in ("E", "En", "Eng"):
+        autosaver.update(Profile(name="Ada", summary=summary))
+    assert threading.active_count() <= threads + 1 # One worker thread, not one per edit
+    wait_for(lambda: writes)
+    assert writes == [{'summary': "Eng"}] # Only the changed field, only once
+    assert store.load("alice", profile_id)[1].summary == "Eng"
+
+
+def test_flush_writes_pending_edits_at_once(store):
+    profile_id = store.create("alice", "Data roles", Profile(name="Ada"))
+    autosaver = ProfileAutosaver(store, profile_id, Profile(name="Ada"), delay_seconds=60)
+    autosaver.update(Profile(name="Ada Lovelace"))
+    autosaver.flush()
+    assert store.load("alice", profile_id)[1].name == "Ada Lovelace"
+
+
+def test_edits_made_during_a_write_are_not_lost(store):
+    profile_id = store.create("alice", "Data roles", Profile(name="Ada"))
+    writing, release = threading.Event(), threading.Event()
+    save_fields = store.save_fields
+
+    def slow_save_fields(*args, **kwargs):
+        writing.set()
+        release.wait(5)
+        return save_fields(*args, **kwargs)
+
+    store.save_fields = slow_save_fields
+    autosaver = ProfileAutosaver(store, profile_id, Profile(name="Ada"), delay_seconds=0.05, worker=AutosaveWorker())
+    autosaver.update(Profile(name="Ada", summary="First"))
+    assert writing.wait(5)
+    autosaver.update(Profile(name="Ada", summary="Second")) # Does not wait for the write in progress
+    release.set()
+    wait_for(lambda: store.load("alice", profile_id)[1].summary == "Second")
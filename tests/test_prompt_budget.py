@@ -0,0 +1,67 @@
+import copy
+
+from prompt_budget import compact_json, entry_text, fit_to_budget
+
+
+def render(profile):
+    return compact_json(profile)
+
+
+def job(title, text):
+    return {'job': title, 'organization': "Acme", 'responsibilities': text, 'projects': ""}
+
+
+PROFILE = {
+    'position': "Data Engineer",
+    'description': "We need a data engineer to build Python pipelines on Spark and Airflow. " * 10,
+    'summary': "Engineer who builds reliable data pipelines.",
+    'tech': "Python, Spark, Airflow, SQL",
+    'work experience': [
+        job("Data Engineer", "Built Spark pipelines in Python. Scheduled them with Airflow. " * 15),
+        job("Pastry Chef", "Baked croissants and cakes for a busy bakery. Managed the ovens. " * 15),
+        job("Analytics Engineer", "Modelled warehouse tables in SQL. Wrote Python data checks. " * 15),
+    ],
+    'Certifications': [{'title': "Food Safety Level 2"}],
+    'Professional Affiliations': [{'name': "Bakers Guild"}],
+}
+
+
+def test_a_profile_within_budget_is_returned_as_is():
+    profile, report = fit_to_budget(PROFILE, render, 10**6)
+    assert profile is PROFILE
+    assert report['fits'] and not report['condensed'] and not report['dropped']
+
+
+# The fixture renders to about 1000 tokens, and to about 620 once every job is condensed
+
+def test_long_entries_are_condensed_before_anything_is_dropped():
+    profile, report = fit_to_budget(PROFILE, render, 700)
+    assert report['fits'] and len(report['condensed']) == 3 and not report['dropped']
+    assert [entry['job'] for entry in profile['work experience']] == ["Data Engineer", "Pastry Chef", "Analytics Engineer"]
+    # The least relevant job is condensed first
+    assert report['condensed'][0].startswith("Pastry Chef")
+
+
+def test_the_least_relevant_entries_are_dropped_next():
+    profile, report = fit_to_budget(PROFILE, render, 550)
+    assert report['fits'] and len(report['condensed']) == 3
+    assert report['dropped'] == ["work experience: " + entry_text(PROFILE['work experience'][1])[:60]]
+    assert [entry['job'] for entry in profile['work experience']] == ["Data Engineer", "Analytics Engineer"]
+    assert profile['Certifications'] == PROFILE['Certifications']
+    assert not report['truncated']
+
+
+def test_an_impossible_budget_is_reported_and_keeps_the_most_relevant_job():
+    profile, report = fit_to_budget(PROFILE, render, 10)
+    assert not report['fits']
+    assert report['final_tokens'] > 10
+    assert [entry['job'] for entry in profile['work experience']] == ["Data Engineer"]
+    # Shortened to its floor, then further as a last resort; the short summary and skills are left alone
+    assert report['truncated'] == ['description', 'description']
+
+
+def test_the_input_is_never_modified():
+    before = copy.deepcopy(PROFILE)
+    for budget in (10, 550, 700):
+        fit_to_budget(PROFILE, render, budget)
+        assert PROFILE == before
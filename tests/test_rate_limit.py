@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from rate_limit import RateLimitTimeout, SingleFlight, TokenBucketLimiter, build_rate_limiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_limiter(request, tmp_path):
+    shared_path = str(tmp_path / "limits.sqlite3") if request.param == "sqlite" else None
+    return lambda *args, **kwargs: build_rate_limiter(*args, shared_path=shared_path, **kwargs)
+
+
+def test_a_burst_up_to_the_quota_does_not_wait(make_limiter):
+    limiter = make_limiter(3, 0, max_wait_seconds=0)
+    assert all(limiter.acquire() < 0.05 for _ in range(3))
+
+
+def test_acquire_fails_fast_when_the_wait_exceeds_max_wait(make_limiter):
+    limiter = make_limiter(2, 0, max_wait_seconds=1)
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire() # The next request is 30s away
+
+
+def test_acquire_waits_for_the_bucket_to_refill(make_limiter):
+    limiter = make_limiter(60, 0) # One request a second
+    for _ in range(60):
+        limiter.acquire()
+    assert 0.3 < limiter.acquire() < 1.5
+
+
+def test_tokens_are_limited_too(make_limiter):
+    limiter = make_limiter(0, 1000, max_wait_seconds=1)
+    limiter.acquire(tokens=900)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(tokens=200)
+    limiter.acquire(tokens=50)
+
+
+def test_refund_returns_unused_quota(make_limiter):
+    limiter = make_limiter(1, 1000, max_wait_seconds=1)
+    limiter.acquire(tokens=1000)
+    limiter.refund(tokens=800, requests=1) # The request never reached the API
+    limiter.acquire(tokens=800)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire()
+
+
+def test_refund_never_overfills_a_bucket(make_limiter):
+    limiter = make_limiter(1, 0, max_wait_seconds=1)
+    limiter.refund(requests=5)
+    limiter.acquire()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire()
+
+
+def test_each_model_has_its_own_buckets(make_limiter):
+    limiter = make_limiter(1, 0, max_wait_seconds=1, model_quotas={"lite": (3, 0)})
+    limiter.acquire(model="main")
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(model="main")
+    for _ in range(3):
+        limiter.acquire(model="lite")
+    limiter.acquire(model="other") # Unlisted models get the default quota, in buckets of their own
+
+
+def test_zero_quotas_never_wait():
+    limiter = TokenBucketLimiter(0, 0, max_wait_seconds=0)
+    for _ in range(100):
+        assert limiter.acquire(tokens=10**6) == 0.0
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("key", slow_call))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1) # Let the followers join the flight
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1]
+    assert results == ["answer"] * 5
+    assert flights.in_flight() == 0
+
+
+def test_single_flight_passes_the_leaders_error_to_followers():
+    flights = SingleFlight()
+    flight, is_leader = flights.join("key")
+    follower, follower_is_leader = flights.join("key")
+    assert is_leader and not follower_is_leader and follower is flight
+    flights.finish("key", flight, error=ValueError("upstream failed"))
+    with pytest.raises(ValueError, match="upstream failed"):
+        follower.wait()
+    # The key is free again: the next call starts a new flight
+    assert flights.do("key", lambda: "retried") == "retried"
@@ -0,0 +1,65 @@
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, make_cache_key
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def test_get_returns_what_was_set(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    assert cache.get("k") is None
+    cache.set("k", "answer")
+    assert cache.get("k") == "answer"
+    assert cache.stats() == {"entries": 1, "bytes": len("answer")}
+
+
+def test_evicts_least_recently_used_entries_over_budget(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=20)
+    cache.set("a", "a" * 10)
+    clock.now += 1
+    cache.set("b", "b" * 10)
+    clock.now += 1
+    assert cache.get("a") is not None # "b" is now the least recently used
+    clock.now += 1
+    cache.set("c", "c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 10
+    assert cache.get("c") == "c" * 10
+
+
+def test_values_larger_than_the_budget_are_not_stored(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=4)
+    cache.set("k", "too long")
+    assert cache.get("k") is None
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+    cache.set("k", "answer")
+    clock.now += 59
+    assert cache.get("k") == "answer"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_key_is_stable_and_scoped():
+    payload = {"contents": [{"parts": [{"text": "hi"}]}], "generationConfig": {"temperature": 0.1}}
+    reordered = {"generationConfig": {"temperature": 0.1}, "contents": [{"parts": [{"text": "hi"}]}]}
+    assert make_cache_key("url", payload) == make_cache_key("url", reordered)
+    assert make_cache_key("url", payload, scope="key-a") != make_cache_key("url", payload, scope="key-b")
+    assert make_cache_key("url", payload) != make_cache_key("other-url", payload)
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from resume_sections import match_sections, parse_sections_response, splice_sections, split_markdown_sections
+
+
+def test_parse_sections_response_reads_every_requested_unit():
+    text = json.dumps({"sections": [{"id": "summary", "markdown": " Great dev. \n"}, {"id": "skills", "markdown": "- Python"}]})
+    assert parse_sections_response(text, ["summary", "skills"]) == {"summary": "Great dev.", "skills": "- Python"}
+
+
+def test_parse_sections_response_accepts_code_fences_and_a_bare_list():
+    text = "```json\n" + json.dumps([{"id": "summary", "markdown": "Great dev."}]) + "\n```"
+    assert parse_sections_response(text, ["summary"]) == {"summary": "Great dev."}
+
+
+def test_parse_sections_response_rejects_missing_or_empty_units():
+    text = json.dumps({"sections": [{"id": "summary", "markdown": "Great dev."}, {"id": "skills", "markdown": "  "}]})
+    with pytest.raises(ValueError, match="skills"):
+        parse_sections_response(text, ["summary", "skills"])
+
+
+def test_parse_sections_response_rejects_invalid_json():
+    with pytest.raises(ValueError):
+        parse_sections_response("Here is your resume!", ["summary"])
+    with pytest.raises(ValueError):
+        parse_sections_response(json.dumps({"text": "no sections"}), ["summary"])
+
+
+RESUME = """# Ada Lovelace
+<div class="contact-info-line">ada@example.com</div>
+
+## Summary
+
+Engineer.
+
+## Skills
+
+- Python
+
+## Experience
+
+### Data Engineer
+
+- Built pipelines.
+
+## Education
+
+BSc Mathematics
+"""
+
+
+@pytest.mark.parametrize("request_text, expected", [
+    ("make the summary shorter", ["Summary"]),
+    ("add more tools and technologies", ["Skills"]),
+    ("quantify the responsibilities", ["Experience"]),
+    ("reword the data engineer role", ["Experience"]),
+    ("mention my GPA and fix the skills", ["Skills", "Education"]),
+])
+def test_match_sections_picks_the_named_sections(request_text, expected):
+    assert match_sections(request_text, RESUME) == expected
+
+
+@pytest.mark.parametrize("request_text", [
+    "make it more concise", # Names no section
+    "tailor the summary to the job", # About the resume as a whole
+    "tone down the whole thing",
+])
+def test_match_sections_refines_everything_when_unsure(request_text):
+    assert match_sections(request_text, RESUME) == []
+
+
+def test_match_sections_matches_whole_words_only():
+    # "tool" and "stack" are Skills keywords, but not inside other words
+    assert match_sections("avoid toolbox and stacked metaphors", RESUME) == []
+
+
+def test_splice_sections_replaces_only_the_refined_bodies():
+    spliced = splice_sections(RESUME, {"Summary": "Seasoned engineer."})
+    preamble, sections = split_markdown_sections(spliced)
+    original_preamble, original_sections = split_markdown_sections(RESUME)
+    assert preamble == original_preamble
+    assert dict(sections) == dict(original_sections, Summary="Seasoned engineer.")
+    assert [title for title, _ in sections] == [title for title, _ in original_sections]
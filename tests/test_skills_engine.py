@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from skills_engine import SkillExtractor, coverage_score, load_taxonomy
+
+TAXONOMY = {
+    "case_sensitive": ["Go"],
+    "categories": {
+        "Languages": ["Python", "Java", ["JavaScript", "JS", "ECMAScript"], ["C++", "CPP"], "Go"],
+        "Frameworks": [["React", "ReactJS"], "React Native"],
+    },
+}
+
+
+@pytest.fixture
+def extractor():
+    return SkillExtractor(TAXONOMY)
+
+
+def test_aliases_map_to_the_canonical_skill(extractor):
+    assert extractor.extract("Strong JS and ecmascript, some cpp") == ["JavaScript", "C++"]
+
+
+def test_skills_are_ranked_by_mentions_then_first_mention(extractor):
+    assert extractor.extract("Python, Java. More Java! Python and Java.") == ["Java", "Python"]
+    assert extractor.extract("React, then Python", limit=1) == ["React"]
+
+
+def test_matches_cover_whole_words_only(extractor):
+    assert extractor.extract("JavaScript") == ["JavaScript"] # Not also "Java"
+    assert extractor.extract("Pythonic code in javaland") == []
+    assert extractor.extract("C++17 and (Python)") == ["C++", "Python"]
+
+
+def test_the_longest_overlapping_match_wins(extractor):
+    assert extractor.extract("React Native apps") == ["React Native"]
+
+
+def test_case_sensitive_names_are_not_matched_as_ordinary_words(extractor):
+    assert extractor.extract("ready to go, written in Go") == ["Go"]
+
+
+def test_match_offsets_index_the_original_text(extractor):
+    text = "İstanbul team using Python"
+    (start, end, name), = extractor.find(text)
+    assert (text[start:end], name) == ("Python", "Python")
+
+
+def test_normalize_maps_known_skills_and_keeps_the_rest(extractor):
+    assert extractor.normalize(["js", " Python ", "Cooking", "JavaScript"]) == ["JavaScript", "Python", "Cooking"]
+
+
+def test_coverage_weights_repeated_skills(extractor):
+    result = coverage_score(extractor, "Python Python Python and Java", "I know Python")
+    assert result['matched'] == ["Python"] and result['missing'] == ["Java"]
+    assert 50 < result['score'] < 100
+    assert coverage_score(extractor, "No skills here", "Python")['score'] is None
+
+
+def test_the_bundled_taxonomy_loads():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "skills_taxonomy.json")
+    extractor = SkillExtractor(load_taxonomy(path))
+    assert {"Python", "JavaScript", "Go"} <= set(extractor.extract("Python, JS and Go"))
@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from resume_sections import SECTIONS_RESPONSE_SCHEMA
+from task_profiles import DEFAULT_PROFILE, TASKS, TaskProfile, load_model_quotas, load_task_profiles
+
+BUNDLED = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "task_profiles.json")
+
+
+@pytest.fixture
+def write_profiles(tmp_path):
+    def write(data):
+        path = tmp_path / "task_profiles.json"
+        path.write_text(json.dumps(data), encoding="utf-8")
+        return str(path)
+    return write
+
+
+def test_the_bundled_file_is_valid():
+    profiles = load_task_profiles(BUNDLED)
+    assert set(TASKS) <= set(profiles)
+    assert profiles["resume_sections"].response_schema == SECTIONS_RESPONSE_SCHEMA
+    assert all(isinstance(quota, tuple) for quota in load_model_quotas(BUNDLED).values())
+
+
+def test_omitted_tasks_and_settings_take_the_defaults(write_profiles):
+    profiles = load_task_profiles(write_profiles({"tasks": {"skills": {"max_output_tokens": 256, "stop_sequences": ["\n\n"]}}}))
+    assert profiles["skills"] == TaskProfile(name="skills", max_output_tokens=256, stop_sequences=("\n\n",))
+    assert profiles["resume"] == TaskProfile(name="resume")
+    assert profiles["resume"].generation_config(0.5) == DEFAULT_PROFILE.generation_config(0.5)
+
+
+def test_extra_tasks_are_kept(write_profiles):
+    profiles = load_task_profiles(write_profiles({"tasks": {"thank_you_note": {"model": "gemini-2.0-flash-lite"}}}))
+    assert profiles["thank_you_note"].model == "gemini-2.0-flash-lite"
+
+
+def test_generation_config_reflects_the_profile():
+    profile = TaskProfile(max_output_tokens=100, stop_sequences=("END",), response_mime_type="application/json")
+    assert profile.generation_config(0.2) == {
+        "temperature": 0.2, "topP": 0.95, "topK": 60, "maxOutputTokens": 100,
+        "responseMimeType": "application/json", "stopSequences": ["END"],
+    }
+    assert profile.generation_config(0.2, response_mime_type="text/plain")["responseMimeType"] == "text/plain"
+
+
+def test_every_invalid_setting_is_reported(write_profiles):
+    path = write_profiles({"tasks": {
+        "skills": {"max_output_tokens": 0, "temprature": 0.2},
+        "resume": {"response_schema": "poem", "top_p": True},
+        "summary": "short",
+    }})
+    with pytest.raises(ValueError) as excinfo:
+        load_task_profiles(path)
+    message = str(excinfo.value)
+    for problem in (
+        "skills.max_output_tokens: must be at least 1",
+        "skills.temprature: unknown setting",
+        "resume.response_schema: unknown schema 'poem'",
+        "resume.top_p: unexpected value True",
+        "summary: expected an object",
+    ):
+        assert problem in message
+
+
+def test_a_file_without_tasks_is_rejected(write_profiles):
+    with pytest.raises(ValueError, match="'tasks' object"):
+        load_task_profiles(write_profiles({"skills": {}}))
+
+
+def test_model_quotas(write_profiles):
+    path = write_profiles({"tasks": {}, "models": {"lite": {"requests_per_minute": 30}, "pro": {"tokens_per_minute": 1000}}})
+    assert load_model_quotas(path) == {"lite": (30, 0), "pro": (0, 1000)}
+    assert load_model_quotas(write_profiles({"tasks": {}})) == {}
+    with pytest.raises(ValueError) as excinfo:
+        load_model_quotas(write_profiles({"tasks": {}, "models": {"lite": {"requests_per_minute": -1}, "pro": {"rpm": 5}}}))
+    assert "lite: quotas must be numbers" in str(excinfo.value) and "pro: expected an object" in str(excinfo.value)